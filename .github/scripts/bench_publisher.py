@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+bench_publisher.py
+
+Benchmarks publish_to_sharepoint.main against the local stand-in server in
+fake_graph_server.py, so changes to the publish path show up as numbers
+rather than impressions.
+
+For each lesson count it:
+  1. Generates that many synthetic week-X/day-YY.md lessons in a temp dir,
+     built from the real lessons in docs/ so rendering cost is realistic
+  2. Seeds the fake site with every other page, so both the create and
+     update paths are exercised
+  3. Runs main() on all the lessons with a cold cache, then a second
+     time with nothing changed
+  4. Reports wall time, HTTP calls per lesson and bytes sent
+
+Usage:
+    python bench_publisher.py                          # 28, 500 and 5,000 lessons
+    python bench_publisher.py --sizes 28 500 --latency-ms 50 --throttle-rate 0.01
+    python bench_publisher.py --no-batch --workers 1   # the old sequential path
+    python bench_publisher.py --json results.json
+"""
+
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+from fake_graph_server import FakeGraph, start_server
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT  = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+
+
+def write_lessons(root: str, count: int) -> list[str]:
+    """Write `count` synthetic lessons under root and return their relative paths."""
+    sources = [
+        open(path, encoding="utf-8").read()
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, "docs", "day-*.md")))
+    ] or ["# Lesson\n\nBody text.\n"]
+
+    paths = []
+    for n in range(count):
+        week, day = n // 7 + 1, n + 1
+        rel = f"week-{week}/day-{day:02d}.md"
+        os.makedirs(os.path.join(root, f"week-{week}"), exist_ok=True)
+        body = sources[n % len(sources)].split("\n", 1)[-1]
+        with open(os.path.join(root, rel), "w", encoding="utf-8") as f:
+            f.write(f"# Day {day} — Synthetic lesson {n}\n{body}")
+        paths.append(rel)
+    return paths
+
+
+def run_publisher(publisher, root: str, changed: list[str], args) -> tuple[float, int]:
+    """Run main() once in root; return (wall seconds, exit code)."""
+    changed_path = os.path.join(root, "changed_files.txt")
+    with open(changed_path, "w") as f:
+        f.write("\n".join(changed) + "\n")
+
+    cwd = os.getcwd()
+    os.chdir(root)
+    code = 0
+    output = io.StringIO()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            publisher.main(
+                changed_path,
+                workers=args.workers,
+                batch=args.batch,
+                cache_dir=os.path.join(root, ".publish-cache"),
+            )
+    except SystemExit as e:
+        code = e.code or 0
+    finally:
+        elapsed = time.perf_counter() - started
+        os.chdir(cwd)
+    if code and args.verbose:
+        print(output.getvalue())
+    return elapsed, code
+
+
+def bench_size(publisher, graph: FakeGraph, count: int, args) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix=f"bench-{count}-") as root:
+        lessons = write_lessons(root, count)
+        graph.reset()
+        for rel in lessons[::2]:
+            graph.add_page(publisher.filepath_to_page_name(rel), "seeded")
+        seeded = graph.stats()["pages"]
+
+        for label in ("cold", "unchanged"):
+            graph.reset_counters()
+
+            elapsed, code = run_publisher(publisher, root, lessons, args)
+            stats = graph.stats()
+            results.append({
+                "lessons": count,
+                "run": label,
+                "seeded_pages": seeded,
+                "wall_seconds": round(elapsed, 3),
+                "exit_code": code,
+                "http_calls": stats["total_calls"],
+                "calls_per_lesson": round(stats["total_calls"] / count, 3),
+                "bytes_sent": stats["bytes_received"],
+                "bytes_per_lesson": round(stats["bytes_received"] / count),
+                "throttled": stats["throttled"],
+                "calls_by_endpoint": stats["calls"],
+            })
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SharePoint publisher against a local fake.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[28, 500, 5000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--batch-item-ms", type=float, default=2.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show publisher output for failed runs")
+    args = parser.parse_args(argv)
+
+    graph = FakeGraph(
+        latency_ms=args.latency_ms,
+        batch_item_ms=args.batch_item_ms,
+        throttle_rate=args.throttle_rate,
+        retry_after=0,
+        page_size=args.page_size,
+    )
+    server = start_server(graph)
+
+    # The publisher reads its endpoints at import time, so point it at the
+    # fake before importing it
+    os.environ["GRAPH_BASE_URL"]      = f"{graph.base_url}/v1.0"
+    os.environ["SHAREPOINT_SITE_URL"] = f"{graph.base_url}/sites/cloud-security-mastery"
+    os.environ["GRAPH_ACCESS_TOKEN"]  = "bench"
+    import publish_to_sharepoint as publisher
+
+    mode = "batch" if args.batch else "individual"
+    print(f"Publisher benchmark — {mode} requests, {args.workers} worker(s), "
+          f"{args.latency_ms:.0f} ms latency, {args.throttle_rate:.1%} throttled\n")
+    print(f"  {'lessons':>7}  {'run':<9}  {'wall s':>8}  {'calls':>7}  "
+          f"{'calls/lesson':>12}  {'KiB sent':>9}  {'429s':>5}  exit")
+
+    results = []
+    for count in args.sizes:
+        for row in bench_size(publisher, graph, count, args):
+            results.append(row)
+            print(f"  {row['lessons']:>7}  {row['run']:<9}  {row['wall_seconds']:>8.2f}  "
+                  f"{row['http_calls']:>7}  {row['calls_per_lesson']:>12.2f}  "
+                  f"{row['bytes_sent'] / 1024:>9.0f}  {row['throttled']:>5}  {row['exit_code']}")
+
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mode": mode, "workers": args.workers, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if any(row["exit_code"] for row in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+build_site.py
+
+Builds the static course site from the lesson Markdown in docs/:
+
+    <out>/index.html                   lesson index, grouped by week
+    <out>/docs/day-XX.html             one page per docs/day-XX.md
+    <out>/assets/site.<hash>.css       one stylesheet shared by every page
+
+Pages are rendered with the same Markdown pipeline as the SharePoint
+publisher (render_markdown_many / extract_h1_title), laid out with the
+templates in .github/site/, and link a single content-hashed stylesheet
+instead of repeating the CSS inline, so browsers fetch it once and can cache
+it forever.
+
+Builds are incremental. <out>/.build-manifest.json records, for every page,
+a hash of its Markdown source and of the layout it was built with (templates,
+stylesheet, render version and the lesson list that feeds the sidebar). A
+page is only rebuilt when one of those changed or its output is missing;
+pages that do need rendering go through the publisher's render cache and
+process pool.
+
+The hand-maintained docs/*.html and index.html are not touched.
+
+Usage:
+    python .github/scripts/build_site.py
+    python .github/scripts/build_site.py --out _site --cache-dir .publish-cache
+    python .github/scripts/build_site.py --force     # ignore the build manifest
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+from html import escape
+from string import Template
+
+from publish_to_sharepoint import (
+    RENDER_VERSION,
+    WEEK_TITLES,
+    extract_h1_title,
+    render_markdown_many,
+)
+
+
+SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "site")
+
+# Bump when the build logic changes output for the same sources and templates.
+BUILD_VERSION = 1
+
+LESSON_SOURCE = re.compile(r"day-(\d+)\.md")
+MD_LINK       = re.compile(r'href="(?:[^"#]*/)?(day-\d+)\.md(#[^"]*)?"')
+
+
+# ── Sources ───────────────────────────────────────────────────────────────────
+
+def discover_lessons(src_dir: str) -> list[dict]:
+    """
+    Return every docs/day-XX.md lesson in day order as
+    {source, day, week, slug, md, sha256, title}.
+    """
+    lessons = []
+    for path in glob.glob(os.path.join(src_dir, "day-*.md")):
+        match = LESSON_SOURCE.fullmatch(os.path.basename(path))
+        if not match:
+            continue
+        with open(path, encoding="utf-8") as f:
+            md_text = f.read()
+        day = int(match.group(1))
+        lessons.append({
+            "source": path,
+            "day":    day,
+            "week":   f"week-{(day - 1) // 7 + 1}",
+            "slug":   os.path.basename(path)[:-3],
+            "md":     md_text,
+            "sha256": hashlib.sha256(md_text.encode("utf-8")).hexdigest(),
+            "title":  extract_h1_title(md_text),
+        })
+    return sorted(lessons, key=lambda lesson: lesson["day"])
+
+
+def short_title(title: str) -> str:
+    """'Day 1 — AWS Account Hardening' → 'AWS Account Hardening'."""
+    return re.sub(r"^Day\s+\d+\s*[—–-]\s*", "", title)
+
+
+# ── Layout ────────────────────────────────────────────────────────────────────
+
+def load_layout() -> dict:
+    """Read the page/index templates and the stylesheet from .github/site/."""
+    def read(name: str) -> str:
+        with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+            return f.read()
+
+    css = read("site.css")
+    return {
+        "page":  Template(read("page.html")),
+        "index": Template(read("index.html")),
+        "css":   css,
+        "css_name": f"site.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]}.css",
+    }
+
+
+def layout_hash(layout: dict, lessons: list[dict]) -> str:
+    """
+    Hash everything a page's output depends on besides its own source:
+    templates, stylesheet, pipeline versions and the sidebar's lesson list.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{BUILD_VERSION}\0{RENDER_VERSION}\0".encode("utf-8"))
+    digest.update(layout["page"].template.encode("utf-8"))
+    digest.update(layout["index"].template.encode("utf-8"))
+    digest.update(layout["css_name"].encode("utf-8"))
+    for lesson in lessons:
+        digest.update(f"\0{lesson['slug']}\0{lesson['title']}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_nav(lessons: list[dict], current: str) -> str:
+    lines = []
+    week = None
+    for lesson in lessons:
+        if lesson["week"] != week:
+            week = lesson["week"]
+            lines.append(f'    <div class="nav-group-label">{escape(WEEK_TITLES.get(week, week))}</div>')
+        css_class = "nav-item current" if lesson["slug"] == current else "nav-item"
+        lines.append(
+            f'    <a class="{css_class}" href="{lesson["slug"]}.html">'
+            f'Day {lesson["day"]} · {escape(short_title(lesson["title"]))}</a>'
+        )
+    return "\n".join(lines)
+
+
+def render_page(layout: dict, lessons: list[dict], i: int, html: str) -> str:
+    lesson = lessons[i]
+    prev_link = next_link = ""
+    if i > 0:
+        prev = lessons[i - 1]
+        prev_link = f'<a class="prev-btn" href="{prev["slug"]}.html">← Day {prev["day"]}</a>'
+    if i + 1 < len(lessons):
+        nxt = lessons[i + 1]
+        next_link = f'<a class="next-btn" href="{nxt["slug"]}.html">Day {nxt["day"]} →</a>'
+
+    built = {lesson["slug"] for lesson in lessons}
+    def link(match: re.Match) -> str:
+        if match.group(1) not in built:
+            return match.group(0)
+        return f'href="{match.group(1)}.html{match.group(2) or ""}"'
+
+    return layout["page"].substitute(
+        title=escape(lesson["title"]),
+        stylesheet=f"../assets/{layout['css_name']}",
+        index="../index.html",
+        nav=render_nav(lessons, lesson["slug"]),
+        week_title=escape(WEEK_TITLES.get(lesson["week"], lesson["week"])),
+        short_title=escape(short_title(lesson["title"])),
+        content=MD_LINK.sub(link, html),
+        prev=prev_link,
+        next=next_link,
+    )
+
+
+def render_index(layout: dict, lessons: list[dict]) -> str:
+    sections = []
+    for week in sorted({lesson["week"] for lesson in lessons}, key=lambda w: int(w.split("-")[1])):
+        cards = "\n".join(
+            f'    <a class="day-card" href="docs/{lesson["slug"]}.html">'
+            f'<span class="day-card-num">Day {lesson["day"]:02d}</span>'
+            f'<span class="day-card-title">{escape(short_title(lesson["title"]))}</span></a>'
+            for lesson in lessons if lesson["week"] == week
+        )
+        sections.append(
+            f'<section class="week {week}">\n'
+            f'  <h2>{escape(WEEK_TITLES.get(week, week))}</h2>\n'
+            f'  <div class="day-grid">\n{cards}\n  </div>\n'
+            f'</section>'
+        )
+    return layout["index"].substitute(
+        stylesheet=f"assets/{layout['css_name']}",
+        lesson_count=len(lessons),
+        weeks="\n".join(sections),
+    )
+
+
+# ── Build ─────────────────────────────────────────────────────────────────────
+
+def write_file(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_build_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, ".build-manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"pages": {}}
+    return manifest if manifest.get("version") == BUILD_VERSION else {"pages": {}}
+
+
+def build_site(
+    src_dir: str = "docs",
+    out_dir: str = "_site",
+    cache_dir: str | None = ".publish-cache",
+    force: bool = False,
+) -> dict:
+    """
+    Build (or bring up to date) the site in out_dir. Returns
+    {"built": [...], "skipped": n, "removed": [...]}.
+    """
+    lessons = discover_lessons(src_dir)
+    layout  = load_layout()
+    layout_key = layout_hash(layout, lessons)
+
+    manifest = {} if force else load_build_manifest(out_dir)
+    if manifest.get("layout") != layout_key:
+        manifest = {"pages": {}}
+    previous = manifest["pages"]
+
+    css_path = os.path.join(out_dir, "assets", layout["css_name"])
+    if not os.path.exists(css_path):
+        write_file(css_path, layout["css"])
+
+    def output_path(slug: str) -> str:
+        return os.path.join(out_dir, "docs", f"{slug}.html")
+
+    stale = [
+        i for i, lesson in enumerate(lessons)
+        if previous.get(lesson["slug"]) != lesson["sha256"] or not os.path.exists(output_path(lesson["slug"]))
+    ]
+    htmls = render_markdown_many([lessons[i]["md"] for i in stale], cache_dir)
+    for i, html in zip(stale, htmls):
+        write_file(output_path(lessons[i]["slug"]), render_page(layout, lessons, i, html))
+
+    index_path = os.path.join(out_dir, "index.html")
+    if stale or not os.path.exists(index_path):
+        write_file(index_path, render_index(layout, lessons))
+
+    # Drop pages whose source was deleted, and superseded stylesheets. Removals
+    # come from the output directory rather than the manifest: deleting a
+    # lesson changes the layout hash, which discards the previous page list.
+    current = {lesson["slug"] for lesson in lessons}
+    removed = sorted(
+        slug for slug in (
+            os.path.splitext(os.path.basename(path))[0]
+            for path in glob.glob(output_path("*"))
+        )
+        if slug not in current
+    )
+    for slug in removed:
+        os.remove(output_path(slug))
+    for path in glob.glob(os.path.join(out_dir, "assets", "site.*.css")):
+        if os.path.basename(path) != layout["css_name"]:
+            os.remove(path)
+
+    pages = {slug: sha for slug, sha in previous.items() if slug in current}
+    pages.update({lessons[i]["slug"]: lessons[i]["sha256"] for i in stale})
+    write_file(
+        os.path.join(out_dir, ".build-manifest.json"),
+        json.dumps({"version": BUILD_VERSION, "layout": layout_key, "pages": pages}, indent=2, sort_keys=True),
+    )
+
+    return {
+        "built":   [lessons[i]["source"] for i in stale],
+        "skipped": len(lessons) - len(stale),
+        "removed": removed,
+    }
+
+
+def main(src_dir: str, out_dir: str, cache_dir: str | None, force: bool) -> None:
+    if not os.path.isdir(src_dir):
+        print(f"❌ Source directory '{src_dir}' not found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    result = build_site(src_dir, out_dir, cache_dir, force)
+    for source in result["built"]:
+        print(f"  🔨 {source}")
+    for slug in result["removed"]:
+        print(f"  🗑️  {slug} (source removed)")
+    print(f"\nSite built in {out_dir}/ — {len(result['built'])} page(s) rebuilt, "
+          f"{result['skipped']} up to date ({time.perf_counter() - started:.2f} s)")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the static course site from docs/*.md.")
+    parser.add_argument("--src", default="docs", help="directory holding day-XX.md lessons (default: docs)")
+    parser.add_argument("--out", default="_site", help="output directory (default: _site)")
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("PUBLISH_CACHE_DIR", ".publish-cache"),
+        help="render cache shared with the publisher (default: $PUBLISH_CACHE_DIR or .publish-cache)",
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild every page, ignoring the build manifest")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.src, args.out, args.cache_dir or None, args.force)
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+fake_graph_server.py
+
+A local stand-in for the parts of Microsoft Graph and SharePoint REST that
+publish_to_sharepoint.py talks to, so the publisher can be run and measured
+without a real tenant.
+
+Endpoints implemented (Graph under /v1.0, SharePoint REST under the site path):
+
+    GET    /v1.0/sites/{hostname}:{path}             resolve a site
+    GET    /v1.0/sites/{id}/pages                    list pages, paged via @odata.nextLink
+    POST   /v1.0/sites/{id}/pages                    create a page
+    PATCH  /v1.0/sites/{id}/pages/{page-id}          update a page
+    POST   /v1.0/sites/{id}/pages/{page-id}/publish  publish a page
+    DELETE /v1.0/sites/{id}/pages/{page-id}          delete a page
+    GET    /v1.0/sites/{id}/drive/root:/{folder}:/children      list a folder
+    PUT    /v1.0/sites/{id}/drive/root:/{folder}/{name}:/content        simple upload
+    POST   /v1.0/sites/{id}/drive/root:/{folder}/{name}:/createUploadSession
+    PUT    /upload/{token}                           upload-session chunk (no auth)
+    POST   /v1.0/$batch                              JSON batching, with dependsOn
+    POST   {site path}/_api/navigation/menustate     replace the navigation
+
+Knobs:
+    --latency-ms       delay added to every HTTP request
+    --batch-item-ms    extra delay per sub-request inside a $batch
+    --throttle-rate    fraction of requests (and batch sub-requests) answered 429
+    --page-size        pages per listing response
+    --pages            number of pre-existing lesson pages to seed
+    --fail-publish     answer every page publish with 500, leaving pages as drafts
+
+Every request is counted per endpoint, together with the bytes received, so a
+benchmark can report calls and payload per lesson (see bench_publisher.py).
+
+Usage:
+    python fake_graph_server.py --port 8765 --latency-ms 30 --pages 500
+
+then point the publisher at it:
+    GRAPH_BASE_URL=http://127.0.0.1:8765/v1.0 \\
+    SHAREPOINT_SITE_URL=http://127.0.0.1:8765/sites/cloud-security-mastery \\
+    GRAPH_ACCESS_TOKEN=fake \\
+    python publish_to_sharepoint.py changed_files.txt
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+SITE_ID = "fake-site-id"
+
+
+class FakeGraph:
+    """In-memory site state plus request accounting, shared by all handler threads."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        batch_item_ms: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        page_size: int = 200,
+        seed: int = 0,
+        fail_publish: bool = False,
+    ) -> None:
+        self.latency_ms    = latency_ms
+        self.batch_item_ms = batch_item_ms
+        self.throttle_rate = throttle_rate
+        self.retry_after   = retry_after
+        self.page_size     = page_size
+        self.fail_publish  = fail_publish
+        self.base_url      = ""   # set once the server is bound
+        self._random       = random.Random(seed)
+        self._lock         = threading.Lock()
+        self.reset()
+
+    # ── State ─────────────────────────────────────────────────────────────────
+
+    def reset(self, pages: int = 0) -> None:
+        """Clear all pages and counters, then seed `pages` lesson pages."""
+        with self._lock:
+            self.pages: dict[str, dict] = {}
+            self.navigation: dict | None = None
+            self.drive: dict[str, dict] = {}     # "folder/name" → {name, size, webUrl}
+            self.uploads: dict[str, dict] = {}   # upload-session token → {path, size, received}
+            self._next_id = 1
+        self.reset_counters()
+        for n in range(pages):
+            week, day = n // 7 + 1, n + 1
+            self.add_page(f"Week-{week}-Day-{day:02d}", f"Day {day}")
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls: Counter = Counter()
+            self.bytes_received = 0
+            self.throttled = 0
+
+    def add_page(self, name: str, title: str) -> dict:
+        """Seed a page as if it had been published earlier."""
+        return self._create({"name": name, "title": title})
+
+    def _create(self, body: dict) -> dict:
+        with self._lock:
+            page_id = f"page-{self._next_id}"
+            self._next_id += 1
+            page = {"id": page_id, "name": body.get("name"), "title": body.get("title"),
+                    "body": body, "published": False}
+            self.pages[page_id] = page
+        return page
+
+    def record(self, endpoint: str, nbytes: int) -> None:
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.bytes_received += nbytes
+
+    def should_throttle(self) -> bool:
+        if self.throttle_rate <= 0:
+            return False
+        with self._lock:
+            hit = self._random.random() < self.throttle_rate
+            if hit:
+                self.throttled += 1
+        return hit
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "bytes_received": self.bytes_received,
+                "throttled": self.throttled,
+                "pages": len(self.pages),
+                "drive_items": len(self.drive),
+            }
+
+    # ── Routing ───────────────────────────────────────────────────────────────
+
+    def dispatch(self, method: str, path: str, query: dict, body) -> tuple[int, dict, object]:
+        """
+        Handle one Graph or SharePoint REST call.
+
+        Returns (status, headers, JSON body or None). Used for top-level
+        requests and for every sub-request inside a $batch.
+        """
+        if self.should_throttle():
+            return 429, {"Retry-After": str(self.retry_after)}, _error("TooManyRequests", "Throttled")
+
+        if method == "POST" and path.endswith("/_api/navigation/menustate"):
+            self.navigation = body
+            return 200, {}, {"d": {}}
+
+        if "/drive/" in path:
+            return self._drive(method, path, body)
+
+        match = re.fullmatch(r"/v1\.0/sites/([^/]+:/.+)", path)
+        if match and method == "GET":
+            return 200, {}, {"id": SITE_ID, "webUrl": match.group(1)}
+
+        match = re.fullmatch(r"/v1\.0/sites/[^/]+/pages", path)
+        if match and method == "GET":
+            return 200, {}, self._list_pages(query)
+        if match and method == "POST":
+            if any(p["name"] == (body or {}).get("name") for p in list(self.pages.values())):
+                return 409, {}, _error("nameAlreadyExists", "A page with this name already exists")
+            page = self._create(body or {})
+            return 201, {}, {"id": page["id"], "name": page["name"]}
+
+        match = re.fullmatch(r"/v1\.0/sites/[^/]+/pages/([^/]+)(/publish)?", path)
+        if match:
+            page = self.pages.get(match.group(1))
+            if page is None:
+                return 404, {}, _error("itemNotFound", "Page not found")
+            if method == "PATCH" and not match.group(2):
+                page.update(title=(body or {}).get("title", page["title"]), body=body, published=False)
+                return 200, {}, {"id": page["id"], "name": page["name"]}
+            if method == "POST" and match.group(2):
+                if self.fail_publish:
+                    return 500, {}, _error("generalException", "Publish failed")
+                page["published"] = True
+                return 204, {}, None
+            if method == "DELETE" and not match.group(2):
+                with self._lock:
+                    self.pages.pop(page["id"], None)
+                return 204, {}, None
+
+        return 404, {}, _error("notFound", f"No fake route for {method} {path}")
+
+    def upload_chunk(self, token: str, data: bytes, content_range: str) -> tuple[int, dict, object]:
+        """Accept one chunk for an upload session; the last one creates the item."""
+        with self._lock:
+            session = self.uploads.get(token)
+        if session is None:
+            return 404, {}, _error("itemNotFound", "Upload session not found")
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", content_range or "")
+        if not match or int(match.group(1)) != session["received"]:
+            return 416, {}, _error("invalidRange", "Unexpected Content-Range")
+        session["received"] += len(data)
+        total = int(match.group(3))
+        if session["received"] < total:
+            return 202, {}, {"nextExpectedRanges": [f"{session['received']}-"]}
+        with self._lock:
+            self.uploads.pop(token, None)
+        return 201, {}, self._store(session["path"], total)
+
+    def _drive(self, method: str, path: str, body) -> tuple[int, dict, object]:
+        match = re.fullmatch(r"/v1\.0/sites/[^/]+/drive/root:/(.+):/children", path)
+        if match and method == "GET":
+            prefix = match.group(1) + "/"
+            items = [item for key, item in list(self.drive.items()) if key.startswith(prefix)]
+            if not items:
+                return 404, {}, _error("itemNotFound", "Folder not found")
+            return 200, {}, {"value": [{"name": i["name"], "webUrl": i["webUrl"]} for i in items]}
+
+        match = re.fullmatch(r"/v1\.0/sites/[^/]+/drive/root:/(.+):/content", path)
+        if match and method == "PUT":
+            return 201, {}, self._store(match.group(1), len(body or b""))
+
+        match = re.fullmatch(r"/v1\.0/sites/[^/]+/drive/root:/(.+):/createUploadSession", path)
+        if match and method == "POST":
+            with self._lock:
+                token = f"session-{self._next_id}"
+                self._next_id += 1
+                self.uploads[token] = {"path": match.group(1), "received": 0}
+            return 200, {}, {"uploadUrl": f"{self.base_url}/upload/{token}"}
+
+        return 404, {}, _error("notFound", f"No fake route for {method} {path}")
+
+    def _store(self, item_path: str, size: int) -> dict:
+        item = {"name": item_path.rsplit("/", 1)[-1], "size": size,
+                "webUrl": f"{self.base_url}/sites/cloud-security-mastery/Shared%20Documents/{item_path}"}
+        with self._lock:
+            self.drive[item_path] = item
+        return item
+
+    def _list_pages(self, query: dict) -> dict:
+        skip = int(query.get("$skiptoken", ["0"])[0])
+        pages = sorted(self.pages.values(), key=lambda p: p["id"])
+        chunk = pages[skip:skip + self.page_size]
+        body = {"value": [{"id": p["id"], "name": p["name"]} for p in chunk]}
+        if skip + self.page_size < len(pages):
+            body["@odata.nextLink"] = (
+                f"{self.base_url}/v1.0/sites/{SITE_ID}/pages"
+                f"?$select=id,name&$skiptoken={skip + self.page_size}"
+            )
+        return body
+
+    def batch(self, body: dict) -> tuple[int, dict, object]:
+        """Run a $batch: sub-requests in order, 424 for anything whose dependency failed."""
+        sub_requests = body.get("requests", [])
+        if len(sub_requests) > 20:
+            return 400, {}, _error("BadRequest", "A batch may contain at most 20 requests")
+
+        statuses: dict[str, int] = {}
+        responses = []
+        for sub in sub_requests:
+            if self.batch_item_ms:
+                time.sleep(self.batch_item_ms / 1000)
+            if any(not 200 <= statuses.get(dep, 0) < 300 for dep in sub.get("dependsOn", [])):
+                status, headers, payload = 424, {}, _error("FailedDependency", "Dependency failed")
+            else:
+                parts = urlsplit(sub["url"])
+                status, headers, payload = self.dispatch(
+                    sub["method"], "/v1.0" + parts.path, parse_qs(parts.query), sub.get("body"),
+                )
+            statuses[sub["id"]] = status
+            response = {"id": sub["id"], "status": status, "headers": headers}
+            if payload is not None:
+                response["body"] = payload
+            responses.append(response)
+        return 200, {}, {"responses": responses}
+
+
+def _error(code: str, message: str) -> dict:
+    return {"error": {"code": code, "message": message}}
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """Collapse IDs so counts group by endpoint, e.g. 'PATCH /v1.0/sites/{id}/pages/{id}'."""
+    path = re.sub(r"/root:/.+:/", "/root:/{path}:/", path)
+    path = re.sub(r"/sites/[^/]+:/.*", "/sites/{hostname}:{path}", path)
+    path = re.sub(r"/(sites|pages|upload)/(?!\{)[^/]+", r"/\1/{id}", path)
+    return f"{method} {path}"
+
+
+# ── HTTP server ───────────────────────────────────────────────────────────────
+
+def make_handler(graph: FakeGraph) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real service
+        # Buffer the response so headers and body leave in one write (the
+        # base class flushes after each request), and send it straight away:
+        # on a keep-alive connection a separate small body write waits on
+        # Nagle plus the client's delayed ACK, ~40 ms per request
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def _handle(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            parts = urlsplit(self.path)
+            graph.record(
+                endpoint_label(self.command, parts.path),
+                len(self.raw_requestline) + len(str(self.headers)) + len(raw),
+            )
+
+            if graph.latency_ms:
+                time.sleep(graph.latency_ms / 1000)
+
+            if parts.path.startswith("/upload/"):
+                # Upload-session URLs are pre-authenticated, like the real ones
+                status, headers, payload = graph.upload_chunk(
+                    parts.path.rsplit("/", 1)[1], raw, self.headers.get("Content-Range"),
+                )
+            elif self.headers.get("Authorization", "").startswith("Bearer "):
+                is_json = "json" in self.headers.get("Content-Type", "")
+                body = (json.loads(raw) if is_json else raw) if raw else None
+                if self.command == "POST" and parts.path == "/v1.0/$batch":
+                    if graph.should_throttle():
+                        status, headers, payload = 429, {"Retry-After": str(graph.retry_after)}, None
+                    else:
+                        status, headers, payload = graph.batch(body or {})
+                else:
+                    status, headers, payload = graph.dispatch(
+                        self.command, parts.path, parse_qs(parts.query), body,
+                    )
+            else:
+                status, headers, payload = 401, {}, _error("InvalidAuthenticationToken", "No bearer token")
+
+            data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+        def log_message(self, format, *args) -> None:
+            pass   # keep benchmark output clean
+
+    return Handler
+
+
+def start_server(graph: FakeGraph, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake on a background thread and return the server (port 0 picks a free one)."""
+    server = ThreadingHTTPServer((host, port), make_handler(graph))
+    server.daemon_threads = True
+    graph.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local Graph/SharePoint stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--batch-item-ms", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=0, help="pre-existing lesson pages to seed")
+    parser.add_argument("--fail-publish", action="store_true", help="answer every page publish with 500")
+    args = parser.parse_args(argv)
+
+    graph = FakeGraph(
+        latency_ms=args.latency_ms,
+        batch_item_ms=args.batch_item_ms,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        page_size=args.page_size,
+        fail_publish=args.fail_publish,
+    )
+    graph.reset(pages=args.pages)
+    server = start_server(graph, args.host, args.port)
+
+    print(f"Fake Graph listening on {graph.base_url}")
+    print(f"  GRAPH_BASE_URL={graph.base_url}/v1.0")
+    print(f"  SHAREPOINT_SITE_URL={graph.base_url}/sites/cloud-security-mastery")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\nRequest counts:")
+        print(json.dumps(graph.stats(), indent=2))
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,21 +28,79 @@ After all pages are published:
   No manual SharePoint navigation editing required — ever.
 
 Usage:
-    python publish_to_sharepoint.py changed_files.txt
+    python publish_to_sharepoint.py changed_files.txt [--workers N] [--batch]
+                                    [--cache-dir DIR] [--token-cache FILE]
+                                    [--metrics-out FILE] [--step-summary]
+    python publish_to_sharepoint.py --reconcile [--workers N] ...
+    python publish_to_sharepoint.py --watch [--preview-port PORT]
 
 Where changed_files.txt is a newline-separated list of relative file paths,
 e.g.:
     week-1/day-01.md
     week-1/day-02.md
+
+--workers N publishes up to N pages concurrently (default: $PUBLISH_WORKERS,
+or 1). Throttling responses from Graph pause every worker, not just the one
+that was throttled, so a larger pool never hammers the tenant.
+
+--batch packs the page upserts and publish calls into Graph JSON $batch
+requests (up to 20 sub-requests each), chaining every publish to its upsert
+with dependsOn. Failures are still reported per lesson file.
+
+--cache-dir holds a manifest of what was last published for each page.
+Lessons whose rendered output matches it are skipped rather than re-uploaded.
+
+--token-cache persists the MSAL token cache to a file so back-to-back runs
+reuse a still-valid token. Tokens are refreshed before expiry either way.
+
+For local runs and benchmarks, GRAPH_BASE_URL points the publisher at a
+different Graph root (e.g. fake_graph_server.py) and GRAPH_ACCESS_TOKEN
+supplies a bearer token directly instead of authenticating with MSAL.
+
+--metrics-out writes phase timings (auth, site resolution, page listing,
+Markdown conversion, upserts, navigation), HTTP call counts, bytes and
+retries per endpoint, and a per-file latency histogram as JSON.
+--step-summary adds the same as a table to the GitHub Actions job summary.
+
+Images and attachments linked from a lesson by relative path are uploaded
+once each, content-addressed, to the site's LessonAssets folder, and the
+links in the page are rewritten to point at them.
+
+--reconcile ignores the changed-files list and syncs the whole repo in one
+pass: it lists the live pages once, compares every lesson's rendered digest
+with the manifest, and through $batch creates missing pages, updates changed
+ones and deletes Week-X-Day-YY pages whose lesson file no longer exists.
+Unchanged pages cost nothing, so it is safe to run at any time.
+
+--watch is for authors working locally: it renders every lesson, serves
+them with the site navigation at http://127.0.0.1:PORT/sites/preview, and
+re-renders a lesson within a fraction of a second of it being saved. The
+open page reloads itself. Nothing is published and no credentials are needed.
 """
 
 import os
 import sys
 import re
 import glob
+import time
+import json
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable
+from html import escape, unescape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
 import markdown
 import requests
 import msal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 # ── Week metadata ─────────────────────────────────────────────────────────────
@@ -56,42 +114,288 @@ WEEK_TITLES = {
     "week-4": "Week 4: Detection & Response",
 }
 
+# How many times a throttled (429/503) request is retried before giving up.
+MAX_THROTTLE_RETRIES = 5
+
+# Graph API root. Overridable so the publisher can run against a local
+# stand-in server (see fake_graph_server.py).
+GRAPH_BASE = os.environ.get("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0").rstrip("/")
+
+# Graph JSON batching: endpoint and the hard limit of sub-requests per batch.
+GRAPH_BATCH_URL   = f"{GRAPH_BASE}/$batch"
+GRAPH_BATCH_LIMIT = 20
+
 
 # ── Authentication ────────────────────────────────────────────────────────────
 
-def get_access_token() -> str:
-    """Authenticate with Azure AD using client credentials and return a Graph API token."""
-    authority = f"https://login.microsoftonline.com/{os.environ['AZURE_TENANT_ID']}"
+class TokenProvider:
+    """
+    Hands out Graph access tokens for the client-credentials app, refreshing
+    them shortly before they expire so a long bulk publish never outlives
+    its token.
+
+    Tokens live in an msal.SerializableTokenCache. Given a cache_path, the
+    cache is loaded from and saved back to that file, so back-to-back runs
+    on the same machine reuse a still-valid token instead of re-authenticating.
+    The file holds a live bearer token: it is written owner-only, and should
+    only be persisted somewhere nobody else can read.
+    """
 
-    app = msal.ConfidentialClientApplication(
-        client_id=os.environ["AZURE_CLIENT_ID"],
-        client_credential=os.environ["AZURE_CLIENT_SECRET"],
-        authority=authority,
-    )
-    result = app.acquire_token_for_client(
-        scopes=["https://graph.microsoft.com/.default"]
-    )
+    SCOPES = ["https://graph.microsoft.com/.default"]
+
+    # Refresh this many seconds before expiry (MSAL itself treats tokens with
+    # under five minutes left as expired).
+    REFRESH_MARGIN = 300
+
+    def __init__(self, cache_path: str | None = None) -> None:
+        self.cache_path = cache_path
+        self._cache = msal.SerializableTokenCache()
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding="utf-8") as f:
+                self._cache.deserialize(f.read())
+
+        self._app = msal.ConfidentialClientApplication(
+            client_id=os.environ["AZURE_CLIENT_ID"],
+            client_credential=os.environ["AZURE_CLIENT_SECRET"],
+            authority=f"https://login.microsoftonline.com/{os.environ['AZURE_TENANT_ID']}",
+            token_cache=self._cache,
+        )
+        self._lock = threading.Lock()
+        self._token: str | None = None
+        self._expires_at = 0.0
+
+    def __call__(self) -> str:
+        """Return a token with at least REFRESH_MARGIN seconds left."""
+        with self._lock:
+            if self._token and time.time() < self._expires_at - self.REFRESH_MARGIN:
+                return self._token
+
+            # Served from the token cache when it still holds a valid token
+            result = self._app.acquire_token_for_client(scopes=self.SCOPES)
+            if "access_token" not in result:
+                error = result.get("error_description", "Unknown authentication error")
+                raise RuntimeError(f"Authentication failed: {error}")
+
+            self._token = result["access_token"]
+            self._expires_at = time.time() + int(result.get("expires_in", 0))
+            self._save()
+            return self._token
+
+    def invalidate(self) -> None:
+        """Forget the in-memory token so the next call goes back to MSAL."""
+        with self._lock:
+            self._token = None
+
+    def _save(self) -> None:
+        if not (self.cache_path and self._cache.has_state_changed):
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        fd = os.open(self.cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self._cache.serialize())
+        self._cache.has_state_changed = False
+
+
+# ── HTTP: throttling ──────────────────────────────────────────────────────────
+
+class Throttle:
+    """
+    Backoff gate shared by every worker thread.
 
-    if "access_token" not in result:
-        error = result.get("error_description", "Unknown authentication error")
-        print(f"❌ Authentication failed: {error}")
-        sys.exit(1)
+    When Graph or SharePoint answers 429/503, the Retry-After delay applies to
+    the whole tenant, not just the request that tripped it — so every worker
+    waits until the gate reopens instead of each one retrying on its own.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        """Block until any active backoff has expired."""
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
-    return result["access_token"]
+    def pause(self, seconds: float) -> None:
+        """Hold all workers for at least `seconds` from now."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def retry_after_seconds(headers, attempt: int) -> float:
+    """Return how long to back off given a throttled response's headers.
+
+    Honours Retry-After in either form Graph uses (delta-seconds or an
+    HTTP date); falls back to exponential backoff when it's absent.
+    """
+    header = headers.get("Retry-After")
+    if header:
+        try:
+            return max(float(header), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(header).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return float(2 ** attempt)
+
+
+class GraphClient:
+    """
+    The one HTTP client every Graph and SharePoint REST call goes through.
+
+    Built once in main, it owns:
+      - a pooled requests.Session, so calls reuse keep-alive connections
+        instead of paying a TCP + TLS handshake each time
+      - the Authorization header, taken from the token provider on every
+        request so tokens refreshed mid-run are picked up
+      - a urllib3 Retry policy that re-sends idempotent calls on transient 5xx
+      - the shared Throttle for 429/503 responses
+      - per-endpoint call counts, latencies, bytes and retries, printed by
+        report() and exported by stats()
+    """
+
+    # Idempotent methods are retried on these statuses by urllib3; 429/503
+    # are left to the Throttle so every worker backs off together. urllib3
+    # would otherwise retry those itself whenever Retry-After is set, so
+    # respect_retry_after_header is turned off.
+    RETRY_STATUSES = (500, 502, 504)
+    RETRY_METHODS  = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+    def __init__(self, token_provider: Callable[[], str], pool_size: int = 10) -> None:
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=self.RETRY_METHODS,
+            raise_on_status=False,
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.token_provider = token_provider
+
+        self.throttle = Throttle()
+        self._stats: dict[str, dict] = {}
+        self._stats_lock = threading.Lock()
+
+    def request(self, method: str, url: str, authenticated: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a request, backing off on 429/503 throttling.
+
+        The final response is returned as-is (throttled or not) so callers keep
+        their existing status handling. A 401 is retried once with a freshly
+        acquired token. Pass authenticated=False for pre-authenticated URLs
+        (upload sessions), which must not carry an Authorization header.
+        """
+        extra_headers = kwargs.pop("headers", None) or {}
+        reauthenticated = False
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            self.throttle.wait()
+            headers = dict(extra_headers)
+            if authenticated:
+                headers["Authorization"] = f"Bearer {self.token_provider()}"
+            started = time.perf_counter()
+            resp = self.session.request(method, url, headers=headers, **kwargs)
+            elapsed = time.perf_counter() - started
+
+            if (resp.status_code == 401 and authenticated and not reauthenticated
+                    and hasattr(self.token_provider, "invalidate")):
+                self._record(method, url, resp, elapsed, retrying=True)
+                self.token_provider.invalidate()
+                reauthenticated = True
+                continue
+
+            if resp.status_code not in (429, 503) or attempt == MAX_THROTTLE_RETRIES:
+                self._record(method, url, resp, elapsed, retrying=False)
+                return resp
+            self._record(method, url, resp, elapsed, retrying=True)
+            delay = retry_after_seconds(resp.headers, attempt)
+            print(f"     ⏳ Throttled ({resp.status_code}) — backing off {delay:.0f}s")
+            self.throttle.pause(delay)
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def _record(self, method: str, url: str, resp: requests.Response, seconds: float, retrying: bool) -> None:
+        body = resp.request.body or b""
+        # Retries urllib3 made inside this one call, plus our own re-send
+        retries = len(getattr(getattr(resp.raw, "retries", None), "history", None) or ()) + retrying
+
+        with self._stats_lock:
+            entry = self._stats.setdefault(endpoint_key(method, url), {
+                "calls": 0, "seconds": 0.0, "bytes_sent": 0, "bytes_received": 0,
+                "retries": 0, "errors": 0,
+            })
+            entry["calls"]          += 1
+            entry["seconds"]        += seconds
+            entry["bytes_sent"]     += len(body)
+            entry["bytes_received"] += len(resp.content)
+            entry["retries"]        += retries
+            entry["errors"]         += resp.status_code >= 400
+
+    def stats(self) -> dict[str, dict]:
+        """Return a snapshot of the per-endpoint statistics."""
+        with self._stats_lock:
+            return {endpoint: dict(entry) for endpoint, entry in self._stats.items()}
+
+    def report(self) -> None:
+        """Print call counts and latencies per endpoint for this run."""
+        with self._stats_lock:
+            stats = sorted(self._stats.items())
+        if not stats:
+            return
+        print("\n  HTTP calls by endpoint:")
+        for endpoint, entry in stats:
+            avg_ms = 1000 * entry["seconds"] / entry["calls"]
+            print(f"    {entry['calls']:>5} × {endpoint}  "
+                  f"(avg {avg_ms:.0f} ms, total {entry['seconds']:.1f} s)")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """Collapse a request URL into a per-endpoint label for call statistics.
+
+    e.g. ('POST', 'https://graph.microsoft.com/v1.0/sites/abc/pages/123/publish')
+      →  'POST graph.microsoft.com/v1.0/sites/{id}/pages/{id}/publish'
+    """
+    parts = urlsplit(url)
+    path  = re.sub(r"/root:/[^:]+:", "/root:/{path}:", parts.path)
+    path  = re.sub(r"/sites/[^/]+:/.*", "/sites/{hostname}:{path}", path)
+    path  = re.sub(r"/(sites|pages)/(?!\{)[^/]+", r"/\1/{id}", path)
+    return f"{method} {parts.netloc}{path}"
 
 
 # ── SharePoint: Pages ─────────────────────────────────────────────────────────
 
-def get_site_id(token: str, site_url: str) -> str:
+def get_site_id(client: GraphClient, site_url: str) -> str:
     """Resolve a SharePoint site URL to its Graph API site ID."""
-    match = re.match(r"https://([^/]+)(/.*)", site_url)
+    match = re.match(r"https?://([^/]+)(/.*)", site_url)
     if not match:
         print(f"❌ Cannot parse SharePoint site URL: {site_url}")
         sys.exit(1)
 
     hostname, path = match.groups()
-    url = f"https://graph.microsoft.com/v1.0/sites/{hostname}:{path}"
-    resp = requests.get(url, headers={"Authorization": f"Bearer {token}"})
+    url = f"{GRAPH_BASE}/sites/{hostname}:{path}"
+    resp = client.get(url)
     resp.raise_for_status()
     return resp.json()["id"]
 
@@ -102,7 +406,7 @@ def get_site_url_base(site_url: str) -> str:
     e.g. 'https://contoso.sharepoint.com/sites/cloud-security-mastery'
       →  'https://contoso.sharepoint.com'
     """
-    match = re.match(r"(https://[^/]+)", site_url)
+    match = re.match(r"(https?://[^/]+)", site_url)
     return match.group(1) if match else site_url
 
 
@@ -112,37 +416,46 @@ def get_site_path(site_url: str) -> str:
     e.g. 'https://contoso.sharepoint.com/sites/cloud-security-mastery'
       →  '/sites/cloud-security-mastery'
     """
-    match = re.match(r"https://[^/]+(/.*)", site_url)
+    match = re.match(r"https?://[^/]+(/.*)", site_url)
     return match.group(1) if match else "/"
 
 
-def list_all_pages(token: str, site_id: str) -> list[dict]:
-    """Return a list of all pages in the SharePoint site's Pages library."""
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/pages"
-    resp = requests.get(url, headers={"Authorization": f"Bearer {token}"})
-    resp.raise_for_status()
-    return resp.json().get("value", [])
-
+def list_all_pages(client: GraphClient, site_id: str) -> list[dict]:
+    """Return every page in the SharePoint site's Pages library.
 
-def find_existing_page(token: str, site_id: str, page_name: str) -> str | None:
-    """Return the page ID if a page with this name already exists, else None."""
-    for page in list_all_pages(token, site_id):
-        if page.get("name") == page_name:
-            return page["id"]
-    return None
+    Graph returns the library in pages of results; follow @odata.nextLink
+    until it runs out so large sites don't silently lose their tail.
+    Only id and name are selected — that's all the publisher needs.
+    """
+    url = f"{GRAPH_BASE}/sites/{site_id}/pages?$select=id,name"
+    pages = []
+    while url:
+        resp = client.get(url)
+        resp.raise_for_status()
+        body = resp.json()
+        pages.extend(body.get("value", []))
+        url = body.get("@odata.nextLink")
+    return pages
 
 
-def upsert_page(token: str, site_id: str, page_name: str, page_title: str, html_content: str) -> str:
+def build_page_index(client: GraphClient, site_id: str) -> dict[str, str]:
     """
-    Create a new SharePoint page, or update it if one with this name already exists.
-    Returns the page ID.
+    List the Pages library once and return a {page name → page ID} index.
+
+    Built at the start of a run and kept up to date as pages are created,
+    so every upsert is a dictionary lookup instead of a full library listing.
     """
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
+    return {page["name"]: page["id"] for page in list_all_pages(client, site_id) if page.get("name")}
 
-    payload = {
+
+def find_existing_page(page_index: dict[str, str], page_name: str) -> str | None:
+    """Return the page ID if a page with this name already exists, else None."""
+    return page_index.get(page_name)
+
+
+def build_page_payload(page_name: str, page_title: str, html_content: str) -> dict:
+    """Return the Graph sitePage body for a one-column page holding html_content."""
+    return {
         "@odata.type": "#microsoft.graph.sitePage",
         "name": page_name,
         "title": page_title,
@@ -166,31 +479,438 @@ def upsert_page(token: str, site_id: str, page_name: str, page_title: str, html_
         },
     }
 
-    existing_id = find_existing_page(token, site_id, page_name)
+
+def upsert_page(
+    client: GraphClient,
+    site_id: str,
+    page_name: str,
+    page_title: str,
+    html_content: str,
+    page_index: dict[str, str],
+) -> str:
+    """
+    Create a new SharePoint page, or update it if one with this name already exists.
+    Newly created pages are added to page_index. Returns the page ID.
+    """
+    headers = {"Content-Type": "application/json"}
+
+    payload = build_page_payload(page_name, page_title, html_content)
+
+    existing_id = find_existing_page(page_index, page_name)
 
     if existing_id:
-        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/pages/{existing_id}"
-        resp = requests.patch(url, headers=headers, json=payload)
+        url = f"{GRAPH_BASE}/sites/{site_id}/pages/{existing_id}"
+        resp = client.patch(url, headers=headers, json=payload)
     else:
-        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/pages"
-        resp = requests.post(url, headers=headers, json=payload)
+        url = f"{GRAPH_BASE}/sites/{site_id}/pages"
+        resp = client.post(url, headers=headers, json=payload)
 
     if resp.status_code not in (200, 201):
-        print(f"❌ Failed to upsert page '{page_name}': {resp.status_code}\n{resp.text}")
-        resp.raise_for_status()
+        # Raised, not printed: report_file prints each failure once, in lesson order
+        raise requests.HTTPError(f"upsert failed — {resp.status_code}: {resp.text}", response=resp)
 
     page_id = resp.json()["id"]
+    page_index[page_name] = page_id
 
     # Publish immediately so it's visible to all site members
-    publish_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/pages/{page_id}/publish"
-    requests.post(publish_url, headers={"Authorization": f"Bearer {token}"})
+    publish_url = f"{GRAPH_BASE}/sites/{site_id}/pages/{page_id}/publish"
+    publish_resp = client.post(publish_url)
+
+    if not publish_resp.ok:
+        raise requests.HTTPError(
+            f"publish failed — {publish_resp.status_code}: {publish_resp.text}", response=publish_resp,
+        )
 
     return page_id
 
 
+# ── SharePoint: Batched pages ─────────────────────────────────────────────────
+#
+# Graph's JSON batching endpoint accepts up to 20 sub-requests per call. Each
+# lesson becomes a small "group" of sub-requests that must travel in the same
+# batch — an upsert and the publish that dependsOn it — and groups are packed
+# into batches until the 20-request limit is reached.
+
+def split_into_batches(groups: list[list[dict]]) -> list[list[dict]]:
+    """Pack sub-request groups into batches of at most GRAPH_BATCH_LIMIT requests."""
+    batches, current = [], []
+    for group in groups:
+        if current and len(current) + len(group) > GRAPH_BATCH_LIMIT:
+            batches.append(current)
+            current = []
+        current.extend(group)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def sub_response_error(sub_response: dict) -> str:
+    """Summarise a failed $batch sub-response as 'status: message'."""
+    body = sub_response.get("body")
+    message = ""
+    if isinstance(body, dict):
+        message = body.get("error", {}).get("message", "")
+    return f"{sub_response.get('status')}: {message}".rstrip(": ")
+
+
+def send_batch(client: GraphClient, sub_requests: list[dict]) -> dict[str, dict]:
+    """
+    Send one $batch of sub-requests and return {sub-request id → sub-response}.
+
+    Sub-requests throttled inside the batch (429/503) are re-sent together
+    with anything that failed only because it depended on them (424), after
+    the shared Throttle backoff. Whatever is still failing after
+    MAX_THROTTLE_RETRIES is returned as-is for the caller to report.
+    """
+    headers = {"Content-Type": "application/json"}
+    responses: dict[str, dict] = {}
+    pending = sub_requests
+
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        resp = client.post(GRAPH_BATCH_URL, headers=headers, json={"requests": pending})
+        resp.raise_for_status()
+        for sub_response in resp.json().get("responses", []):
+            responses[sub_response["id"]] = sub_response
+
+        throttled = {
+            r["id"] for r in pending if responses.get(r["id"], {}).get("status") in (429, 503)
+        }
+        if not throttled or attempt == MAX_THROTTLE_RETRIES:
+            break
+
+        # Re-send the throttled requests plus their dependents that got 424
+        retry_ids = set(throttled)
+        for r in pending:
+            if responses.get(r["id"], {}).get("status") == 424 and retry_ids & set(r.get("dependsOn", [])):
+                retry_ids.add(r["id"])
+
+        delay = max(retry_after_seconds(responses[i].get("headers", {}), attempt) for i in throttled)
+
+        retry = []
+        for r in pending:
+            if r["id"] not in retry_ids:
+                continue
+            # dependsOn may only name requests that are in the same batch
+            deps = [d for d in r.get("dependsOn", []) if d in retry_ids]
+            r = {k: v for k, v in r.items() if k != "dependsOn"}
+            if deps:
+                r["dependsOn"] = deps
+            retry.append(r)
+        pending = retry
+
+        print(f"     ⏳ {len(throttled)} batched request(s) throttled — backing off {delay:.0f}s")
+        client.throttle.pause(delay)
+
+    return responses
+
+
+def run_batches(client: GraphClient, groups: list[list[dict]], workers: int) -> dict[str, dict]:
+    """Send every group through $batch (up to `workers` batches in flight) and merge the results.
+
+    A batch whose HTTP call fails outright reports that error against each of
+    its sub-requests, so one bad batch can't hide which lessons it carried.
+    """
+    def send(batch: list[dict]) -> dict[str, dict]:
+        started = time.perf_counter()
+        try:
+            result = send_batch(client, batch)
+        except Exception as e:
+            result = {r["id"]: {"id": r["id"], "status": 0, "body": {"error": {"message": str(e)}}}
+                      for r in batch}
+        # Every sub-request in a batch shares the batch's round-trip time
+        elapsed = time.perf_counter() - started
+        for sub_response in result.values():
+            sub_response["elapsed"] = elapsed
+        return result
+
+    responses: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(send, split_into_batches(groups)):
+            responses.update(result)
+    return responses
+
+
+def batch_upsert_pages(
+    client: GraphClient,
+    site_id: str,
+    jobs: list[dict],
+    page_index: dict[str, str],
+    workers: int = 1,
+    latencies: dict[str, float] | None = None,
+) -> dict[str, str | None]:
+    """
+    Upsert and publish many pages through Graph $batch.
+
+    Each job is a dict with filepath, page_name, page_title and html. Pages
+    already in page_index are PATCHed with the publish call chained via
+    dependsOn in the same batch. New pages are POSTed first and published in
+    a second round once their IDs are known. Created pages are added to
+    page_index. If latencies is given, it is filled with {filepath → seconds}
+    spent in the batches that carried each lesson.
+
+    Returns {filepath → None on success, or an error string}.
+    """
+    site_path = f"/sites/{site_id}/pages"
+    results: dict[str, str | None] = {}
+    json_headers = {"Content-Type": "application/json"}
+
+    # ── Round 1: PATCH (+ publish) existing pages, POST new ones ─────────────
+    groups, chained = [], set()
+    for n, job in enumerate(jobs):
+        upsert_id, publish_id = f"u{n}", f"p{n}"
+        payload = build_page_payload(job["page_name"], job["page_title"], job["html"])
+        existing_id = find_existing_page(page_index, job["page_name"])
+
+        if existing_id:
+            groups.append([
+                {"id": upsert_id, "method": "PATCH", "url": f"{site_path}/{existing_id}",
+                 "headers": json_headers, "body": payload},
+                {"id": publish_id, "method": "POST", "url": f"{site_path}/{existing_id}/publish",
+                 "dependsOn": [upsert_id]},
+            ])
+            chained.add(publish_id)
+        else:
+            groups.append([
+                {"id": upsert_id, "method": "POST", "url": site_path,
+                 "headers": json_headers, "body": payload},
+            ])
+
+    responses = run_batches(client, groups, workers)
+    latencies = {} if latencies is None else latencies
+
+    created = []
+    for n, job in enumerate(jobs):
+        upsert = responses.get(f"u{n}", {"status": 0})
+        latencies[job["filepath"]] = upsert.get("elapsed", 0.0)
+        if upsert.get("status") not in (200, 201):
+            results[job["filepath"]] = f"upsert failed — {sub_response_error(upsert)}"
+            continue
+
+        page_id = page_index.get(job["page_name"]) or upsert.get("body", {}).get("id")
+        page_index[job["page_name"]] = page_id
+
+        if f"p{n}" in chained:
+            publish = responses.get(f"p{n}", {"status": 0})
+            ok = 200 <= publish.get("status", 0) < 300
+            results[job["filepath"]] = None if ok else f"publish failed — {sub_response_error(publish)}"
+        else:
+            created.append((n, job, page_id))
+
+    # ── Round 2: publish the pages created in round 1 ─────────────────────────
+    if created:
+        groups = [
+            [{"id": f"p{n}", "method": "POST", "url": f"{site_path}/{page_id}/publish"}]
+            for n, _, page_id in created
+        ]
+        responses = run_batches(client, groups, workers)
+        for n, job, _ in created:
+            publish = responses.get(f"p{n}", {"status": 0})
+            latencies[job["filepath"]] += publish.get("elapsed", 0.0)
+            ok = 200 <= publish.get("status", 0) < 300
+            results[job["filepath"]] = None if ok else f"publish failed — {sub_response_error(publish)}"
+
+    return results
+
+
+def batch_delete_pages(
+    client: GraphClient,
+    site_id: str,
+    pages: dict[str, str],
+    workers: int = 1,
+) -> dict[str, str | None]:
+    """
+    Delete pages {page name → page ID} through Graph $batch.
+
+    Returns {page name → None on success, or an error string}. A page that is
+    already gone (404) counts as deleted.
+    """
+    names = list(pages)
+    groups = [
+        [{"id": f"d{n}", "method": "DELETE", "url": f"/sites/{site_id}/pages/{pages[name]}"}]
+        for n, name in enumerate(names)
+    ]
+    responses = run_batches(client, groups, workers)
+
+    results = {}
+    for n, name in enumerate(names):
+        response = responses.get(f"d{n}", {"status": 0})
+        ok = response.get("status") in (200, 204, 404)
+        results[name] = None if ok else f"delete failed — {sub_response_error(response)}"
+    return results
+
+
+# ── SharePoint: Lesson assets ─────────────────────────────────────────────────
+#
+# Images and attachments a lesson links to with a relative path are uploaded to
+# the site's document library and the links rewritten to point at them. Files
+# are stored content-addressed — named by the sha256 of their bytes — so each
+# unique blob is uploaded once however many lessons use it, and the manifest's
+# {sha256 → webUrl} asset index means a re-publish never re-sends bytes the
+# site already has.
+
+ASSET_FOLDER = "LessonAssets"
+
+# Files up to this size go up in one PUT; larger ones use a resumable upload
+# session in chunks, which Graph requires to be multiples of 320 KiB.
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024
+UPLOAD_CHUNK_SIZE   = 10 * 320 * 1024
+
+ASSET_REF = re.compile(r'\b(src|href)="([^"]+)"')
+
+
+def find_local_assets(filepath: str, html: str) -> dict[str, str]:
+    """
+    Return {reference as written in the HTML → local file path} for every
+    image or attachment the lesson links to with a relative path.
+
+    Links to other lessons (.md), absolute URLs, anchors and files outside
+    the repo are left alone.
+    """
+    root = os.path.abspath(os.getcwd())
+    assets = {}
+    for ref in {m.group(2) for m in ASSET_REF.finditer(html)}:
+        if re.match(r"[a-zA-Z][a-zA-Z0-9+.-]*:|[#/]", ref):
+            continue
+        rel = unquote(unescape(ref)).split("#")[0].split("?")[0]
+        path = os.path.normpath(os.path.join(os.path.dirname(filepath), rel))
+        if not rel or path.endswith(".md") or not os.path.isfile(path):
+            continue
+        if os.path.commonpath([os.path.abspath(path), root]) != root:
+            continue
+        assets[ref] = path
+    return assets
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def asset_item_name(sha256: str, path: str) -> str:
+    """Content-addressed drive item name, keeping the extension for the MIME type."""
+    return f"{sha256}{os.path.splitext(path)[1].lower()}"
+
+
+def list_asset_folder(client: GraphClient, site_id: str) -> dict[str, str]:
+    """Return {item name → webUrl} for everything already in the asset folder."""
+    url = f"{GRAPH_BASE}/sites/{site_id}/drive/root:/{ASSET_FOLDER}:/children?$select=name,webUrl"
+    items = {}
+    while url:
+        resp = client.get(url)
+        if resp.status_code == 404:   # folder not created yet
+            return items
+        resp.raise_for_status()
+        body = resp.json()
+        items.update({item["name"]: item["webUrl"] for item in body.get("value", [])})
+        url = body.get("@odata.nextLink")
+    return items
+
+
+def upload_asset(client: GraphClient, site_id: str, path: str, item_name: str) -> str:
+    """Upload one file into the asset folder and return its webUrl."""
+    item_url = f"{GRAPH_BASE}/sites/{site_id}/drive/root:/{ASSET_FOLDER}/{item_name}"
+    size = os.path.getsize(path)
+
+    if size <= SIMPLE_UPLOAD_LIMIT:
+        with open(path, "rb") as f:
+            resp = client.put(f"{item_url}:/content", data=f.read(),
+                              headers={"Content-Type": "application/octet-stream"})
+        resp.raise_for_status()
+        return resp.json()["webUrl"]
+
+    resp = client.post(
+        f"{item_url}:/createUploadSession",
+        json={"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+    )
+    resp.raise_for_status()
+    upload_url = resp.json()["uploadUrl"]
+
+    with open(path, "rb") as f:
+        offset = 0
+        while offset < size:
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+            end = offset + len(chunk) - 1
+            # The upload URL is pre-authenticated; sending a token is an error
+            resp = client.put(
+                upload_url,
+                data=chunk,
+                authenticated=False,
+                headers={"Content-Length": str(len(chunk)), "Content-Range": f"bytes {offset}-{end}/{size}"},
+            )
+            resp.raise_for_status()
+            offset = end + 1
+
+    return resp.json()["webUrl"]
+
+
+def upload_assets(
+    client: GraphClient,
+    site_id: str,
+    jobs: list[dict],
+    asset_urls: dict[str, str],
+    workers: int = 1,
+) -> dict[str, str]:
+    """
+    Make sure every asset the jobs reference is on the site.
+
+    asset_urls is the {sha256 → webUrl} index from the manifest and is
+    updated in place. The asset folder is only listed when some asset is
+    missing from the index, and only blobs the site doesn't have are uploaded.
+    Returns {sha256 → error} for uploads that failed.
+    """
+    needed = {
+        asset["sha256"]: asset["path"]
+        for job in jobs for asset in job["assets"].values()
+        if asset["sha256"] not in asset_urls
+    }
+    if not needed:
+        return {}
+
+    existing = list_asset_folder(client, site_id)
+    to_upload = []
+    for sha256, path in needed.items():
+        name = asset_item_name(sha256, path)
+        if name in existing:
+            asset_urls[sha256] = existing[name]
+        else:
+            to_upload.append((sha256, path, name))
+
+    def upload(item: tuple[str, str, str]) -> tuple[str, str | None, str | None]:
+        sha256, path, name = item
+        try:
+            return sha256, upload_asset(client, site_id, path, name), None
+        except Exception as e:
+            return sha256, None, str(e)
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for sha256, url, error in pool.map(upload, to_upload):
+            if error:
+                errors[sha256] = error
+            else:
+                asset_urls[sha256] = url
+                print(f"  ⬆️  Uploaded asset {needed[sha256]}")
+    return errors
+
+
+def rewrite_asset_links(html: str, urls: dict[str, str]) -> str:
+    """Point every src/href whose reference is in urls at its uploaded location."""
+    def replace(match: re.Match) -> str:
+        url = urls.get(match.group(2))
+        return f'{match.group(1)}="{escape(url)}"' if url else match.group(0)
+    return ASSET_REF.sub(replace, html)
+
+
 # ── SharePoint: Navigation ────────────────────────────────────────────────────
 
-def build_nav_nodes(site_url: str, all_lesson_files: list[str]) -> list[dict]:
+def build_nav_nodes(
+    site_url: str,
+    all_lesson_files: list[str],
+    title_for: Callable[[str], str] | None = None,
+) -> list[dict]:
     """
     Build the full navigation node tree from all lesson files that exist in the repo.
 
@@ -203,7 +923,11 @@ def build_nav_nodes(site_url: str, all_lesson_files: list[str]) -> list[dict]:
             ...
         📅 Week 2: Zero Trust Identity
             ...
+
+    Titles come from title_for(filepath) — typically a TitleIndex — and
+    default to reading each file's H1 directly.
     """
+    title_for = title_for or extract_h1_title_from_file
     site_path = get_site_path(site_url)
     pages_base = f"{site_path}/SitePages"
 
@@ -237,7 +961,7 @@ def build_nav_nodes(site_url: str, all_lesson_files: list[str]) -> list[dict]:
 
         for filepath in by_week[week_key]:
             page_name  = filepath_to_page_name(filepath)        # Week-1-Day-01
-            page_title = extract_h1_title_from_file(filepath)   # Day 1 — AWS Account...
+            page_title = title_for(filepath)                    # Day 1 — AWS Account...
             children.append({
                 "displayName": page_title,
                 "webUrl": f"{pages_base}/{page_name}.aspx",
@@ -253,33 +977,14 @@ def build_nav_nodes(site_url: str, all_lesson_files: list[str]) -> list[dict]:
     return nodes
 
 
-def update_navigation(token: str, site_id: str, site_url: str, all_lesson_files: list[str]) -> None:
-    """
-    Rebuild the SharePoint site's left-hand navigation from scratch using
-    all lesson files currently present in the repo.
-
-    SharePoint's navigation is managed via the site's NavigationLinks API.
-    We replace the entire navigation on each run so it always reflects the
-    current state of the repo — no stale links, no manual cleanup needed.
-    """
-    print("\n  Rebuilding site navigation...")
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
-    # Fetch the current navigation nodes so we can delete them first
-    nav_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root/children"
-
-    # Use the SharePoint REST API for navigation (Graph doesn't expose nav directly)
-    # We call the SharePoint REST endpoint via the same token
-    sp_base = get_site_url_base(site_url)
+def build_menu_state(
+    site_url: str,
+    all_lesson_files: list[str],
+    title_for: Callable[[str], str] | None = None,
+) -> dict:
+    """Build the full navigation payload in SharePoint's MenuState format."""
     site_path = get_site_path(site_url)
-    rest_base = f"{sp_base}{site_path}/_api/navigation/menustate"
-
-    # Build the full navigation payload in SharePoint's MenuState format
-    nav_nodes = build_nav_nodes(site_url, all_lesson_files)
+    nav_nodes = build_nav_nodes(site_url, all_lesson_files, title_for)
 
     menu_nodes = []
     node_id = 1000  # SharePoint navigation nodes need unique integer IDs
@@ -318,32 +1023,142 @@ def update_navigation(token: str, site_id: str, site_url: str, all_lesson_files:
             "Nodes":             menu_nodes,
         }
     }
+    return payload
+
+
+def menu_state_digest(payload: dict) -> str:
+    """Return a stable sha256 of a MenuState payload, for change detection."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def update_navigation(
+    client: GraphClient,
+    site_id: str,
+    site_url: str,
+    all_lesson_files: list[str],
+    title_for: Callable[[str], str] | None = None,
+    previous_digest: str | None = None,
+) -> str | None:
+    """
+    Rebuild the SharePoint site's left-hand navigation from scratch using
+    all lesson files currently present in the repo.
+
+    SharePoint's navigation is managed via the site's NavigationLinks API.
+    We replace the entire navigation on each run so it always reflects the
+    current state of the repo — no stale links, no manual cleanup needed.
+
+    The POST is skipped when the generated menu's digest matches
+    previous_digest (the menu last sent successfully). Returns the digest of
+    the navigation now live on the site, or None if the update failed.
+    """
+    print("\n  Rebuilding site navigation...")
+
+    # Use the SharePoint REST API for navigation (Graph doesn't expose nav directly)
+    # We call the SharePoint REST endpoint through the same client and token
+    sp_base = get_site_url_base(site_url)
+    site_path = get_site_path(site_url)
+    rest_base = f"{sp_base}{site_path}/_api/navigation/menustate"
+
+    payload = build_menu_state(site_url, all_lesson_files, title_for)
+    digest  = menu_state_digest(payload)
+
+    if digest == previous_digest:
+        print(f"  = Navigation unchanged — {len(all_lesson_files)} lesson(s) in menu, skipped")
+        return digest
 
     sp_headers = {
-        "Authorization": f"Bearer {token}",
         "Accept":        "application/json;odata=verbose",
         "Content-Type":  "application/json;odata=verbose",
     }
 
-    resp = requests.post(rest_base, headers=sp_headers, json=payload)
+    resp = client.post(rest_base, headers=sp_headers, json=payload)
 
     if resp.status_code in (200, 204):
         print(f"  ✅ Navigation updated — {len(all_lesson_files)} lesson(s) in menu")
-    else:
-        # Navigation update failing should not fail the whole publish run —
-        # pages are already live, nav is a convenience layer
-        print(f"  ⚠️  Navigation update returned {resp.status_code} — pages are still published")
-        print(f"      Response: {resp.text[:300]}")
+        return digest
+
+    # Navigation update failing should not fail the whole publish run —
+    # pages are already live, nav is a convenience layer
+    print(f"  ⚠️  Navigation update returned {resp.status_code} — pages are still published")
+    print(f"      Response: {resp.text[:300]}")
+    return None
 
 
 # ── Markdown processing ───────────────────────────────────────────────────────
 
+MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "toc", "nl2br"]
+
+# Bump when the rendering pipeline changes in a way that alters output for the
+# same Markdown, so stale entries in the on-disk render cache are never reused.
+RENDER_VERSION = 1
+
+# Below this many cache misses, rendering in-process beats process-pool startup.
+PARALLEL_RENDER_THRESHOLD = 16
+
+# Each thread (and each pool process) keeps its own Markdown instance —
+# building one loads every extension, and instances aren't thread-safe.
+_markdown_local = threading.local()
+
+
 def convert_markdown_to_html(md_text: str) -> str:
     """Convert Markdown to HTML. Supports tables, fenced code blocks, and TOC."""
-    return markdown.markdown(
-        md_text,
-        extensions=["tables", "fenced_code", "toc", "nl2br"],
-    )
+    md = getattr(_markdown_local, "md", None)
+    if md is None:
+        md = _markdown_local.md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return md.reset().convert(md_text)
+
+
+def render_cache_key(md_text: str) -> str:
+    """Content hash identifying the HTML that md_text renders to."""
+    salt = f"{RENDER_VERSION}|{markdown.__version__}|{','.join(MARKDOWN_EXTENSIONS)}\0"
+    return hashlib.sha256((salt + md_text).encode("utf-8")).hexdigest()
+
+
+def render_markdown_many(md_texts: list[str], cache_dir: str | None = None) -> list[str]:
+    """
+    Render many Markdown documents to HTML, in order.
+
+    Output is memoised on disk under <cache_dir>/render by content hash, so
+    unchanged lessons are never re-rendered. Cache misses are rendered
+    in-process when there are only a few, or across a process pool using
+    every core when there are many.
+    """
+    render_dir = os.path.join(cache_dir, "render") if cache_dir else None
+    htmls: list[str | None] = [None] * len(md_texts)
+    misses: list[tuple[int, str]] = []
+
+    for i, md_text in enumerate(md_texts):
+        key = render_cache_key(md_text)
+        if render_dir:
+            try:
+                with open(os.path.join(render_dir, key[:2], f"{key}.html"), encoding="utf-8") as f:
+                    htmls[i] = f.read()
+                continue
+            except FileNotFoundError:
+                pass
+        misses.append((i, key))
+
+    if len(misses) >= PARALLEL_RENDER_THRESHOLD and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as pool:
+            rendered = list(pool.map(
+                convert_markdown_to_html,
+                (md_texts[i] for i, _ in misses),
+                chunksize=max(1, len(misses) // (4 * (os.cpu_count() or 1))),
+            ))
+    else:
+        rendered = [convert_markdown_to_html(md_texts[i]) for i, _ in misses]
+
+    for (i, key), html in zip(misses, rendered):
+        htmls[i] = html
+        if render_dir:
+            path = os.path.join(render_dir, key[:2], f"{key}.html")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(f"{path}.tmp", path)
+
+    return htmls
 
 
 def extract_h1_title(md_text: str) -> str:
@@ -352,17 +1167,106 @@ def extract_h1_title(md_text: str) -> str:
     return match.group(1).strip() if match else "Untitled Lesson"
 
 
+H1_LINE = re.compile(r"^#\s+(.+)$")
+
+
 def extract_h1_title_from_file(filepath: str) -> str:
-    """Read a file and extract its H1 title. Returns a fallback if the file is missing."""
+    """Read a file up to its first H1 and return the title. Returns a fallback if the file is missing.
+
+    Stops at the first `# ` line rather than reading the whole lesson.
+    """
     try:
         with open(filepath, encoding="utf-8") as f:
-            return extract_h1_title(f.read())
+            for line in f:
+                match = H1_LINE.match(line.rstrip("\r\n"))
+                if match:
+                    return match.group(1).strip()
+        return "Untitled Lesson"
     except FileNotFoundError:
         # File exists in a previous commit but not checked out — use the filename
         basename = os.path.splitext(os.path.basename(filepath))[0]
         return basename.replace("-", " ").title()
 
 
+class TitleIndex:
+    """
+    Lesson H1 titles cached by file path, keyed on each file's git blob ID.
+
+    Persisted as <cache_dir>/titles.json, so rebuilding the navigation only
+    opens lessons whose content changed since the last run. Blob IDs come
+    from one `git ls-files` call, so unlike mtimes they survive a fresh
+    checkout in CI. Files git doesn't track, or that have uncommitted
+    changes, are always read. Call the index like a function to look up a
+    title.
+    """
+
+    def __init__(self, cache_dir: str | None = None) -> None:
+        self.path = os.path.join(cache_dir, "titles.json") if cache_dir else None
+        self._entries: dict[str, dict] = {}
+        self._blobs: dict[str, str] | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.path:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (FileNotFoundError, ValueError):
+                pass
+
+    def __call__(self, filepath: str) -> str:
+        key = os.path.normpath(filepath)
+        blob = self.blob_ids().get(key)
+        if blob is None:
+            return extract_h1_title_from_file(filepath)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.get("blob") == blob:
+                return entry["title"]
+
+        title = extract_h1_title_from_file(filepath)
+        with self._lock:
+            self._entries[key] = {"blob": blob, "title": title}
+            self._dirty = True
+        return title
+
+    def blob_ids(self) -> dict[str, str]:
+        """{path: blob ID} for tracked files whose working copy matches the index."""
+        with self._lock:
+            if self._blobs is None:
+                self._blobs = {}
+                try:
+                    staged = subprocess.run(
+                        ["git", "ls-files", "-s", "-z"], capture_output=True, text=True, check=True,
+                    ).stdout
+                    modified = set(subprocess.run(
+                        ["git", "ls-files", "-m", "-z"], capture_output=True, text=True, check=True,
+                    ).stdout.split("\0"))
+                except (OSError, subprocess.CalledProcessError):
+                    # Not a git checkout — every title is read from its file
+                    return self._blobs
+                for line in filter(None, staged.split("\0")):
+                    info, path = line.split("\t", 1)
+                    if path not in modified:
+                        self._blobs[os.path.normpath(path)] = info.split()[1]
+            return self._blobs
+
+    def save(self) -> None:
+        if not (self.path and self._dirty):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(f"{self.path}.tmp", self.path)
+        self._dirty = False
+
+
+# Page names filepath_to_page_name produces for week-X/day-YY.md lessons.
+# Reconcile only ever deletes pages whose names match this exactly, so Home,
+# Prerequisites and hand-made pages are never touched.
+LESSON_PAGE_NAME = re.compile(r"Week-\d+-Day-\d+")
+
+
 def filepath_to_page_name(filepath: str) -> str:
     """
     Derive a unique, URL-safe SharePoint page name from the lesson filepath.
@@ -397,66 +1301,746 @@ def discover_all_lesson_files() -> list[str]:
     return sorted(files, key=sort_key)
 
 
-# ── Main ──────────────────────────────────────────────────────────────────────
+# ── Publish manifest ──────────────────────────────────────────────────────────
+#
+# The manifest records a digest of what was last published for every page,
+# of the navigation menu last sent to the site, and where each uploaded asset
+# lives:
+#
+#     {"version": 1,
+#      "pages": {"Week-1-Day-01": "<sha256>", ...},
+#      "navigation": "<sha256>",
+#      "assets": {"<sha256 of file>": "<webUrl>", ...}}
+#
+# It lives in the publish cache directory, which the workflow persists between
+# runs with actions/cache. A page whose rendered title + HTML still matches its
+# recorded digest is skipped, so whitespace-only commits, reverts and re-runs
+# after a partial failure only touch pages whose output actually changed. The
+# navigation POST is likewise skipped when the generated menu is identical.
 
-def main(changed_files_path: str) -> None:
-    with open(changed_files_path) as f:
-        changed_files = [line.strip() for line in f if line.strip()]
+MANIFEST_VERSION = 1
 
-    if not changed_files:
-        print("No lesson files changed — nothing to publish.")
-        return
 
-    print(f"Publishing {len(changed_files)} lesson file(s) to SharePoint...\n")
+def manifest_path(cache_dir: str) -> str:
+    return os.path.join(cache_dir, "manifest.json")
 
-    token    = get_access_token()
-    site_url = os.environ["SHAREPOINT_SITE_URL"]
-    site_id  = get_site_id(token, site_url)
 
-    success, failed = 0, 0
+def load_manifest(cache_dir: str) -> dict:
+    """Load the publish manifest, or return an empty one if missing or unreadable."""
+    try:
+        with open(manifest_path(cache_dir), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "pages": {}}
 
-    # ── Step 1: Publish each changed file ─────────────────────────────────────
-    for filepath in changed_files:
-        if not os.path.exists(filepath):
-            print(f"  ⚠️  Skipping '{filepath}' — file not found in checkout")
-            failed += 1
+
+def save_manifest(cache_dir: str, manifest: dict) -> None:
+    """Write the manifest atomically so an interrupted run can't corrupt it."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = manifest_path(cache_dir)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def content_digest(page_title: str, html: str, asset_hashes: list[str] = ()) -> str:
+    """Return the sha256 of a page's rendered output (title + HTML + linked asset contents)."""
+    asset_part = ",".join(sorted(asset_hashes))
+    return hashlib.sha256(f"{page_title}\0{html}\0{asset_part}".encode("utf-8")).hexdigest()
+
+
+# ── Run metrics ───────────────────────────────────────────────────────────────
+
+class RunMetrics:
+    """
+    Phase timings, counters and per-file latencies for one publish run.
+
+    Written as JSON (--metrics-out) so publish cost can be trended across runs,
+    and optionally as a Markdown table in the GitHub Actions step summary.
+    HTTP statistics come from the GraphClient at write time.
+    """
+
+    # Upper bounds (ms) of the per-file latency histogram buckets
+    LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self) -> None:
+        self.started_at = datetime.now(timezone.utc)
+        self.phases: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.file_latencies: list[float] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as a named phase of the run."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def latency_summary(self) -> dict:
+        """Percentiles and a bucketed histogram of per-file publish latency."""
+        values = sorted(1000 * v for v in self.file_latencies)
+        if not values:
+            return {"count": 0}
+
+        def pct(p: float) -> float:
+            return round(values[min(len(values) - 1, int(p * len(values)))], 1)
+
+        buckets = {f"le_{b}ms": 0 for b in self.LATENCY_BUCKETS_MS}
+        buckets["gt_max"] = 0
+        for v in values:
+            bound = next((b for b in self.LATENCY_BUCKETS_MS if v <= b), None)
+            buckets[f"le_{bound}ms" if bound else "gt_max"] += 1
+
+        return {
+            "count": len(values),
+            "p50_ms": pct(0.50),
+            "p90_ms": pct(0.90),
+            "p99_ms": pct(0.99),
+            "max_ms": round(values[-1], 1),
+            "histogram": buckets,
+        }
+
+    def to_dict(self, client: "GraphClient | None" = None) -> dict:
+        http = client.stats() if client else {}
+        return {
+            "started_at": self.started_at.isoformat(),
+            "total_seconds": round((datetime.now(timezone.utc) - self.started_at).total_seconds(), 3),
+            "phases_seconds": {name: round(v, 3) for name, v in self.phases.items()},
+            "counts": dict(self.counts),
+            "file_latency": self.latency_summary(),
+            "http": {
+                "calls": sum(e["calls"] for e in http.values()),
+                "bytes_sent": sum(e["bytes_sent"] for e in http.values()),
+                "bytes_received": sum(e["bytes_received"] for e in http.values()),
+                "retries": sum(e["retries"] for e in http.values()),
+                "by_endpoint": {
+                    endpoint: {**entry, "seconds": round(entry["seconds"], 3)}
+                    for endpoint, entry in sorted(http.items())
+                },
+            },
+        }
+
+    def write_json(self, path: str, client: "GraphClient | None" = None) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(client), f, indent=2)
+        print(f"\n  Run metrics written to {path}")
+
+    def write_step_summary(self, path: str, client: "GraphClient | None" = None) -> None:
+        """Append a Markdown summary of the run to the GitHub Actions step summary file."""
+        data = self.to_dict(client)
+        lines = [
+            "### SharePoint publish",
+            "",
+            "| Phase | Seconds |",
+            "|---|---:|",
+            *(f"| {name} | {secs:.2f} |" for name, secs in data["phases_seconds"].items()),
+            f"| **total** | **{data['total_seconds']:.2f}** |",
+            "",
+            "| Count | Value |",
+            "|---|---:|",
+            *(f"| {name} | {n} |" for name, n in data["counts"].items()),
+            f"| HTTP calls | {data['http']['calls']} |",
+            f"| HTTP retries | {data['http']['retries']} |",
+            f"| KiB sent | {data['http']['bytes_sent'] / 1024:.0f} |",
+            "",
+        ]
+        latency = data["file_latency"]
+        if latency["count"]:
+            lines += [
+                f"Per-file latency: p50 {latency['p50_ms']} ms · p90 {latency['p90_ms']} ms · "
+                f"p99 {latency['p99_ms']} ms · max {latency['max_ms']} ms",
+                "",
+            ]
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+# ── Local preview (--watch) ───────────────────────────────────────────────────
+#
+# --watch renders lessons in memory and serves them, with the same navigation
+# tree the site gets, from a local HTTP server. Nothing is sent to SharePoint.
+# Lesson files are polled; a burst of saves is debounced into one refresh
+# that re-renders only the files that changed, rebuilds the navigation, and
+# bumps a version the open page polls so the browser reloads itself.
+
+PREVIEW_SITE_URL_PATH = "/sites/preview"
+PREVIEW_WATCH_PATTERNS = (
+    os.path.join("week-*", "day-*.md"),
+    os.path.join("docs", "day-*.md"),
+)
+# Non-lesson pages the navigation links to, keyed by the file they come from.
+PREVIEW_EXTRA_PAGES = {"README.md": "", "PREREQUISITES.md": "SitePages/Prerequisites.aspx"}
+PREVIEW_STYLESHEET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "site", "site.css")
+
+PREVIEW_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>{title} · preview</title>
+<link rel="stylesheet" href="/__site.css">
+</head>
+<body>
+<div class="shell">
+<aside class="sidebar"><nav class="lesson-nav">
+{nav}
+</nav></aside>
+<div class="main"><article class="lesson-pane">
+{content}
+</article></div>
+</div>
+<script>
+(function poll(version) {{
+  fetch("/__version").then(r => r.text()).then(v => {{
+    if (v !== version) location.reload(); else setTimeout(() => poll(version), 300);
+  }}).catch(() => setTimeout(() => poll(version), 1000));
+}})("{version}");
+</script>
+</body>
+</html>
+"""
+
+
+def scan_watched_files() -> dict[str, tuple[int, int]]:
+    """Return {path: (mtime_ns, size)} for every lesson and extra page on disk."""
+    snapshot = {}
+    paths = [path for pattern in PREVIEW_WATCH_PATTERNS for path in glob.glob(pattern)]
+    for path in paths + list(PREVIEW_EXTRA_PAGES):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
             continue
+        snapshot[path.replace("\\", "/")] = (st.st_mtime_ns, st.st_size)
+    return snapshot
 
+
+def watch_files(
+    on_change: Callable[[set[str], set[str]], None],
+    interval: float = 0.2,
+    debounce: float = 0.15,
+    stop: threading.Event | None = None,
+) -> None:
+    """
+    Poll the watched files and call on_change(changed, removed) after each
+    burst of edits, once nothing has changed for `debounce` seconds.
+    """
+    stop = stop or threading.Event()
+    known = scan_watched_files()
+    while not stop.wait(interval):
+        current = scan_watched_files()
+        if current == known:
+            continue
+        # Editors often write a file in several steps; wait for it to settle
+        while not stop.wait(debounce):
+            settled = scan_watched_files()
+            if settled == current:
+                break
+            current = settled
+        changed = {path for path, sig in current.items() if known.get(path) != sig}
+        removed = set(known) - set(current)
+        known = current
+        on_change(changed, removed)
+
+
+class PreviewSite:
+    """Rendered pages and navigation for the preview server, updated file by file."""
+
+    def __init__(self, base_url: str) -> None:
+        self.site_url = f"{base_url}{PREVIEW_SITE_URL_PATH}"
+        self.pages: dict[str, dict] = {}      # URL path → {filepath, title, html}
+        self.asset_files: set[str] = set()
+        self.nav_nodes: list[dict] = []
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def url_path(self, filepath: str) -> str:
+        if filepath in PREVIEW_EXTRA_PAGES:
+            return f"{PREVIEW_SITE_URL_PATH}/{PREVIEW_EXTRA_PAGES[filepath]}".rstrip("/")
+        return f"{PREVIEW_SITE_URL_PATH}/SitePages/{filepath_to_page_name(filepath)}.aspx"
+
+    def render_file(self, filepath: str) -> dict:
         with open(filepath, encoding="utf-8") as f:
             md_text = f.read()
+        html = convert_markdown_to_html(md_text)
+        assets = find_local_assets(filepath, html)
+        html = rewrite_asset_links(html, {ref: f"/__repo/{path.replace(os.sep, '/')}" for ref, path in assets.items()})
+        return {"filepath": filepath, "title": extract_h1_title(md_text), "html": html, "assets": set(assets.values())}
+
+    def refresh(self, changed: set[str], removed: set[str] = frozenset()) -> None:
+        """Re-render the changed files, drop removed ones and rebuild the navigation."""
+        rendered = {self.url_path(path): self.render_file(path) for path in changed}
+        with self._lock:
+            for path in removed:
+                self.pages.pop(self.url_path(path), None)
+            self.pages.update(rendered)
+            self.asset_files = {a for page in self.pages.values() for a in page["assets"]}
+
+            titles = {page["filepath"]: page["title"] for page in self.pages.values()}
+            lessons = [path for path in titles if path not in PREVIEW_EXTRA_PAGES]
+            self.nav_nodes = build_nav_nodes(self.site_url, lessons, title_for=titles.__getitem__)
+            self.version += 1
+
+    @staticmethod
+    def render_nav(nodes: list[dict], current: str) -> str:
+        def link(node: dict) -> str:
+            css_class = "nav-item current" if node["webUrl"] == current else "nav-item"
+            return f'<a class="{css_class}" href="{escape(node["webUrl"])}">{escape(node["displayName"])}</a>'
+
+        lines = []
+        for node in nodes:
+            if node["webUrl"]:
+                lines.append(link(node))
+            else:
+                lines.append(f'<div class="nav-group-label">{escape(node["displayName"])}</div>')
+            lines.extend(link(child) for child in node["children"])
+        return "\n".join(lines)
+
+    def page(self, url_path: str) -> str | None:
+        url_path = url_path.rstrip("/")
+        with self._lock:
+            page = self.pages.get(url_path)
+            if page is None:
+                return None
+            return PREVIEW_PAGE.format(
+                title=escape(page["title"]),
+                nav=self.render_nav(self.nav_nodes, url_path),
+                content=page["html"],
+                version=self.version,
+            )
+
+
+def make_preview_handler(site: PreviewSite) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            path = unquote(urlsplit(self.path).path)
+            if path == "/":
+                self._send(302, b"", "text/plain", {"Location": PREVIEW_SITE_URL_PATH})
+            elif path == "/__version":
+                self._send(200, str(site.version).encode(), "text/plain")
+            elif path == "/__site.css":
+                with open(PREVIEW_STYLESHEET, "rb") as f:
+                    self._send(200, f.read(), "text/css")
+            elif path.startswith("/__repo/") and path[len("/__repo/"):] in site.asset_files:
+                with open(path[len("/__repo/"):], "rb") as f:
+                    self._send(200, f.read(), "application/octet-stream")
+            else:
+                html = site.page(path)
+                if html is None:
+                    self._send(404, b"Not found", "text/plain")
+                else:
+                    self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+        def _send(self, status: int, data: bytes, content_type: str, headers: dict | None = None) -> None:
+            self.send_response(status)
+            for name, value in {"Content-Type": content_type, "Cache-Control": "no-store", **(headers or {})}.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args) -> None:
+            pass   # the watcher's own output is the useful part
+
+    return Handler
+
+
+def watch_and_preview(host: str = "127.0.0.1", port: int = 8000) -> None:
+    """Render every lesson, serve the preview, and keep it current until Ctrl+C."""
+    server = ThreadingHTTPServer((host, port), None)
+    base_url = f"http://{host}:{server.server_address[1]}"
+    site = PreviewSite(base_url)
+    server.RequestHandlerClass = make_preview_handler(site)
+    server.daemon_threads = True
+
+    started = time.perf_counter()
+    site.refresh(set(scan_watched_files()))
+    lesson_count = sum(1 for page in site.pages.values() if page["filepath"] not in PREVIEW_EXTRA_PAGES)
+    print(f"👀 Rendered {lesson_count} lesson(s) in {time.perf_counter() - started:.2f} s")
+    print(f"   Preview: {site.site_url}")
+    print("   Watching week-*/ and docs/ for changes — Ctrl+C to stop\n")
+
+    def on_change(changed: set[str], removed: set[str]) -> None:
+        started = time.perf_counter()
+        try:
+            site.refresh(changed, removed)
+        except Exception as e:
+            print(f"  ❌ Rebuild failed — {e}")
+            return
+        for path in sorted(changed):
+            print(f"  🔄 {path}")
+        for path in sorted(removed):
+            print(f"  🗑️  {path}")
+        print(f"     re-rendered in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        watch_files(on_change)
+    except KeyboardInterrupt:
+        print("\nStopping preview")
+    finally:
+        server.shutdown()
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def load_lessons(filepaths: list[str], cache_dir: str | None = None) -> tuple[list[dict], list[str]]:
+    """
+    Read and render lesson files into publish jobs:
+    {filepath, page_name, page_title, html, assets, digest}.
+
+    assets maps each local image/attachment reference in the HTML to
+    {path, sha256}; asset contents count towards the digest, so replacing an
+    image republishes the lessons that show it.
 
+    Returns (jobs, missing) where missing lists the files not in the checkout.
+    """
+    sources, missing = [], []
+    for filepath in filepaths:
+        if not os.path.exists(filepath):
+            missing.append(filepath)
+            continue
+        with open(filepath, encoding="utf-8") as f:
+            sources.append((filepath, f.read()))
+
+    htmls = render_markdown_many([md_text for _, md_text in sources], cache_dir)
+
+    jobs = []
+    for (filepath, md_text), html in zip(sources, htmls):
         page_title = extract_h1_title(md_text)
-        page_name  = filepath_to_page_name(filepath)
-        html       = convert_markdown_to_html(md_text)
+        assets = {
+            ref: {"path": path, "sha256": file_sha256(path)}
+            for ref, path in find_local_assets(filepath, html).items()
+        }
+        jobs.append({
+            "filepath":   filepath,
+            "page_title": page_title,
+            "page_name":  filepath_to_page_name(filepath),
+            "html":       html,
+            "assets":     assets,
+            "digest":     content_digest(page_title, html, [a["sha256"] for a in assets.values()]),
+        })
+    return jobs, missing
 
-        print(f"  → {filepath}")
-        print(f"     Title : {page_title}")
-        print(f"     Page  : {page_name}")
 
-        try:
-            upsert_page(token, site_id, page_name, page_title, html)
-            print(f"     ✅ Published\n")
-            success += 1
-        except Exception as e:
-            print(f"     ❌ Failed: {e}\n")
-            failed += 1
+def report_file(job: dict, error: str | None) -> None:
+    """Print the outcome for one lesson file as a single block.
+
+    Called from the main thread once the upserts have finished, so the
+    report follows lesson order however the requests completed.
+    """
+    lines = [
+        f"  → {job['filepath']}",
+        f"     Title : {job['page_title']}",
+        f"     Page  : {job['page_name']}",
+        f"     ❌ Failed: {error}\n" if error else "     ✅ Published\n",
+    ]
+    print("\n".join(lines))
 
-    print(f"Pages done. {success} published, {failed} failed.")
 
-    # ── Step 2: Rebuild navigation from all lesson files in the repo ──────────
+def publish_job(client: GraphClient, site_id: str, job: dict, page_index: dict[str, str]) -> str | None:
+    """Upsert and publish one converted lesson. Returns None on success, else the error."""
+    try:
+        upsert_page(client, site_id, job["page_name"], job["page_title"], job["html"], page_index)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def main(
+    changed_files_path: str | None,
+    workers: int = 1,
+    batch: bool = False,
+    cache_dir: str = ".publish-cache",
+    token_cache: str | None = None,
+    metrics_out: str | None = None,
+    step_summary: bool = False,
+    reconcile: bool = False,
+) -> None:
+    if reconcile:
+        # Full sync: every lesson in the repo, applied through $batch
+        changed_files = discover_all_lesson_files()
+        batch = True
+        if not changed_files:
+            # Never reconcile against an empty checkout — it would delete every lesson page
+            print("❌ No lesson files found in the repo — refusing to reconcile.")
+            sys.exit(1)
+    else:
+        with open(changed_files_path) as f:
+            # dict.fromkeys de-duplicates while keeping order, so no two workers
+            # ever race to create the same page
+            changed_files = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    if not changed_files:
+        print("No lesson files changed — nothing to publish.")
+        return
+
+    mode = "Graph $batch" if batch else "individual requests"
+    action = "Reconciling" if reconcile else "Publishing"
+    print(f"{action} {len(changed_files)} lesson file(s) to SharePoint "
+          f"via {mode} with {workers} worker(s)...\n")
+
+    metrics = RunMetrics()
+    metrics.count("changed_files", len(changed_files))
+
+    with metrics.phase("auth"):
+        if os.environ.get("GRAPH_ACCESS_TOKEN"):
+            # A pre-acquired token (e.g. for the local stand-in server) skips MSAL
+            static_token = os.environ["GRAPH_ACCESS_TOKEN"]
+            token_provider = lambda: static_token
+        else:
+            token_provider = TokenProvider(token_cache)
+        try:
+            token_provider()  # fail fast before any work if credentials are wrong
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    # One pooled client for the whole run; sized so every worker (and each
+    # batch it has in flight) gets its own keep-alive connection
+    client   = GraphClient(token_provider, pool_size=max(10, workers * 2))
+    site_url = os.environ["SHAREPOINT_SITE_URL"]
+
+    with metrics.phase("site_resolution"):
+        site_id = get_site_id(client, site_url)
+
+    # One paginated listing serves every lookup for the rest of the run
+    with metrics.phase("page_listing"):
+        page_index = build_page_index(client, site_id)
+    print(f"Found {len(page_index)} existing page(s) on the site\n")
+    metrics.count("existing_pages", len(page_index))
+
+    manifest = load_manifest(cache_dir)
+    published_digests = manifest["pages"]
+
+    created, updated, skipped, deleted, failed = 0, 0, 0, 0, 0
+
+    # ── Step 1: Convert each changed file and drop the unchanged ones ─────────
+    with metrics.phase("markdown_conversion"):
+        lessons, missing = load_lessons(changed_files, cache_dir)
+    for filepath in missing:
+        print(f"  ⚠️  Skipping '{filepath}' — file not found in checkout")
+        failed += 1
+
+    jobs = []
+    for job in lessons:
+        if (published_digests.get(job["page_name"]) == job["digest"]
+                and job["page_name"] in page_index):
+            # Same rendered output as the last successful publish, and the
+            # page is still on the site — nothing to send
+            print(f"  = {job['filepath']} unchanged since last publish — skipped")
+            skipped += 1
+        else:
+            job["action"] = "update" if job["page_name"] in page_index else "create"
+            jobs.append(job)
+
+    if skipped:
+        print()
+
+    # Reconcile: lesson pages on the site with no lesson file behind them
+    stale = {}
+    if reconcile:
+        local_names = {job["page_name"] for job in lessons}
+        stale = {
+            name: page_id for name, page_id in page_index.items()
+            if LESSON_PAGE_NAME.fullmatch(name) and name not in local_names
+        }
+        print(f"  Reconcile plan: "
+              f"{sum(job['action'] == 'create' for job in jobs)} to create, "
+              f"{sum(job['action'] == 'update' for job in jobs)} to update, "
+              f"{len(stale)} to delete, {skipped} unchanged\n")
+
+    # ── Step 2: Upload linked assets the site doesn't have yet ────────────────
+    asset_urls = manifest.setdefault("assets", {})
+    with metrics.phase("assets"):
+        asset_errors = upload_assets(client, site_id, jobs, asset_urls, workers)
+
+    ready = []
+    for job in jobs:
+        errors = [asset_errors[a["sha256"]] for a in job["assets"].values() if a["sha256"] in asset_errors]
+        if errors:
+            report_file(job, f"asset upload failed — {errors[0]}")
+            failed += 1
+            continue
+        job["html"] = rewrite_asset_links(
+            job["html"], {ref: asset_urls[a["sha256"]] for ref, a in job["assets"].items()},
+        )
+        ready.append(job)
+    jobs = ready
+
+    # ── Step 3: Publish the pages whose output changed ────────────────────────
+    latencies: dict[str, float] = {}
+
+    def timed_publish(job: dict) -> str | None:
+        started = time.perf_counter()
+        error = publish_job(client, site_id, job, page_index)
+        latencies[job["filepath"]] = time.perf_counter() - started
+        return error
+
+    with metrics.phase("upserts"):
+        if batch:
+            errors = batch_upsert_pages(client, site_id, jobs, page_index, workers, latencies)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                errors = dict(zip((job["filepath"] for job in jobs), pool.map(timed_publish, jobs)))
+
+    for job in jobs:
+        error = errors.get(job["filepath"], "no response from batch")
+        report_file(job, error)
+        if error is None:
+            published_digests[job["page_name"]] = job["digest"]
+            if job["action"] == "create":
+                created += 1
+            else:
+                updated += 1
+        else:
+            failed += 1
+    metrics.file_latencies = list(latencies.values())
+
+    if stale:
+        with metrics.phase("deletes"):
+            delete_errors = batch_delete_pages(client, site_id, stale, workers)
+        for name, error in delete_errors.items():
+            if error is None:
+                print(f"  🗑️  Deleted '{name}' — no lesson file in the repo")
+                page_index.pop(name, None)
+                published_digests.pop(name, None)
+                deleted += 1
+            else:
+                print(f"  ❌ Could not delete '{name}': {error}")
+                failed += 1
+        print()
+
+    # Failed pages keep their old digest, so the next run retries exactly those
+    save_manifest(cache_dir, manifest)
+
+    summary = f"{created} created, {updated} updated, {skipped} unchanged (skipped)"
+    if reconcile:
+        summary += f", {deleted} deleted"
+    print(f"Pages done. {summary}, {failed} failed.")
+    metrics.count("created", created)
+    metrics.count("updated", updated)
+    metrics.count("skipped", skipped)
+    metrics.count("deleted", deleted)
+    metrics.count("failed", failed)
+
+    # ── Step 4: Rebuild navigation from all lesson files in the repo ──────────
     # We scan for *all* day-XX.md files (not just the ones that changed) so the
     # nav always reflects the complete current state of the repo.
-    all_lesson_files = discover_all_lesson_files()
-    print(f"\n  Found {len(all_lesson_files)} total lesson file(s) in repo")
-
-    update_navigation(token, site_id, site_url, all_lesson_files)
+    with metrics.phase("navigation"):
+        all_lesson_files = discover_all_lesson_files()
+        print(f"\n  Found {len(all_lesson_files)} total lesson file(s) in repo")
+
+        titles = TitleIndex(cache_dir)
+        manifest["navigation"] = update_navigation(
+            client, site_id, site_url, all_lesson_files,
+            title_for=titles,
+            previous_digest=manifest.get("navigation"),
+        )
+        titles.save()
+    save_manifest(cache_dir, manifest)
+    metrics.count("lessons_in_navigation", len(all_lesson_files))
+
+    client.report()
+    if metrics_out:
+        metrics.write_json(metrics_out, client)
+    if step_summary and os.environ.get("GITHUB_STEP_SUMMARY"):
+        metrics.write_step_summary(os.environ["GITHUB_STEP_SUMMARY"], client)
+    client.close()
 
     if failed:
         sys.exit(1)
 
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Publish lesson Markdown files to SharePoint.")
+    parser.add_argument(
+        "changed_files",
+        nargs="?",
+        help="newline-separated list of lesson files to publish (not used with --reconcile or --watch)",
+    )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="sync every lesson in the repo: create, update and delete pages so the "
+             "site matches the repo exactly (implies --batch)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="don't publish; serve a live local preview that re-renders lessons as they are saved",
+    )
+    parser.add_argument(
+        "--preview-port",
+        type=int,
+        default=8000,
+        help="port for the --watch preview server (default: 8000)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("PUBLISH_WORKERS", "1")),
+        help="number of pages (or batches, with --batch) to publish concurrently "
+             "(default: $PUBLISH_WORKERS or 1)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=f"pack upserts and publish calls into Graph $batch requests "
+             f"of up to {GRAPH_BATCH_LIMIT} sub-requests",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("PUBLISH_CACHE_DIR", ".publish-cache"),
+        help="directory holding the publish manifest and render cache between runs "
+             "(default: $PUBLISH_CACHE_DIR or .publish-cache)",
+    )
+    parser.add_argument(
+        "--token-cache",
+        default=os.environ.get("MSAL_TOKEN_CACHE"),
+        help="file to persist the MSAL token cache in, so consecutive runs reuse "
+             "a valid token (default: $MSAL_TOKEN_CACHE; unset keeps it in memory)",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        default=os.environ.get("PUBLISH_METRICS_OUT"),
+        help="write phase timings, HTTP statistics and per-file latencies to this "
+             "JSON file (default: $PUBLISH_METRICS_OUT)",
+    )
+    parser.add_argument(
+        "--step-summary",
+        action="store_true",
+        help="also append a run summary to $GITHUB_STEP_SUMMARY",
+    )
+    args = parser.parse_args(argv)
+    if not (args.reconcile or args.watch) and not args.changed_files:
+        parser.error("a changed-files list is required unless --reconcile or --watch is given")
+    if args.watch and args.reconcile:
+        parser.error("--watch and --reconcile cannot be combined")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: publish_to_sharepoint.py <changed_files.txt>")
-        sys.exit(1)
-    main(sys.argv[1])
+    args = parse_args()
+    if args.watch:
+        watch_and_preview(port=args.preview_port)
+        sys.exit(0)
+    main(
+        args.changed_files,
+        workers=args.workers,
+        batch=args.batch,
+        cache_dir=args.cache_dir,
+        token_cache=args.token_cache,
+        metrics_out=args.metrics_out,
+        step_summary=args.step_summary,
+        reconcile=args.reconcile,
+    )
@@ -0,0 +1,49 @@
+"""
+Offline tests for build_site.py, building into a temp directory from a copy
+of the lessons in docs/.
+
+    python -m unittest discover -s .github/scripts
+"""
+
+import os
+import glob
+import shutil
+import tempfile
+import unittest
+
+import build_site
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(build_site.SCRIPT_DIR))
+
+
+class RemovedLessonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = os.path.join(self.root, 'docs')
+        self.out = os.path.join(self.root, '_site')
+        os.makedirs(self.src)
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, 'docs', 'day-*.md')))[:3]:
+            shutil.copy(path, self.src)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_page_is_removed_with_its_source(self):
+        build_site.build_site(self.src, self.out, cache_dir=None)
+        sources = sorted(glob.glob(os.path.join(self.src, 'day-*.md')))
+        slug = os.path.basename(sources[-1])[:-3]
+        page = os.path.join(self.out, 'docs', f'{slug}.html')
+        self.assertTrue(os.path.exists(page))
+
+        os.remove(sources[-1])
+        result = build_site.build_site(self.src, self.out, cache_dir=None)
+
+        self.assertEqual(result['removed'], [slug])
+        self.assertFalse(os.path.exists(page))
+        self.assertEqual(len(glob.glob(os.path.join(self.out, 'docs', '*.html'))), len(sources) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Offline tests for publish_to_sharepoint.py, run against the local stand-in
+server in fake_graph_server.py.
+
+    python -m unittest discover -s .github/scripts
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import contextlib
+from unittest import mock
+
+from fake_graph_server import SITE_ID, FakeGraph, start_server
+
+graph = FakeGraph()
+server = start_server(graph)
+
+os.environ['SHAREPOINT_SITE_URL'] = f'{graph.base_url}/sites/cloud-security-mastery'
+os.environ['GRAPH_ACCESS_TOKEN'] = 'test'
+
+import publish_to_sharepoint as publisher
+
+# GRAPH_BASE is read at import time, and another test module may have
+# imported the publisher already, so point it at the fake directly
+publisher.GRAPH_BASE = f'{graph.base_url}/v1.0'
+
+
+def tearDownModule():
+    server.shutdown()
+
+
+class PublishFailureTest(unittest.TestCase):
+
+    def setUp(self):
+        graph.reset()
+        graph.fail_publish = True
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'week-1'))
+        with open(os.path.join(self.root, 'week-1', 'day-01.md'), 'w', encoding='utf-8') as f:
+            f.write('# Day 1 — Account Hardening\n\nBody text.\n')
+        self.changed = os.path.join(self.root, 'changed_files.txt')
+        with open(self.changed, 'w') as f:
+            f.write('week-1/day-01.md\n')
+
+    def tearDown(self):
+        graph.fail_publish = False
+        shutil.rmtree(self.root)
+
+    def run_publisher(self):
+        """Run main() in the temp repo; return (exit code, output)."""
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        output = io.StringIO()
+        code = 0
+        try:
+            with contextlib.redirect_stdout(output):
+                publisher.main(self.changed, cache_dir=os.path.join(self.root, '.publish-cache'))
+        except SystemExit as e:
+            code = e.code or 0
+        finally:
+            os.chdir(cwd)
+        return code, output.getvalue()
+
+    def page(self):
+        return next(p for p in graph.pages.values() if p['name'] == 'Week-1-Day-01')
+
+    def test_failed_publish_is_reported_and_retried_next_run(self):
+        code, output = self.run_publisher()
+        self.assertEqual(code, 1)
+        self.assertEqual(output.count('publish failed'), 1)
+        self.assertIn('❌ Failed: publish failed — 500', output)
+        self.assertNotIn('✅ Published', output)
+        self.assertFalse(self.page()['published'])
+
+        graph.fail_publish = False
+        code, output = self.run_publisher()
+        self.assertEqual(code, 0)
+        self.assertNotIn('skipped', output.split('Pages done.')[0])
+        self.assertIn('✅ Published', output)
+        self.assertTrue(self.page()['published'])
+
+
+class ThrottledRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        graph.reset()
+        graph.throttle_rate, graph.retry_after = 1.0, 0
+        self.client = publisher.GraphClient(lambda: 'test')
+
+    def tearDown(self):
+        graph.throttle_rate, graph.retry_after = 0.0, 1
+        self.client.close()
+
+    def test_throttled_get_is_left_to_the_shared_throttle(self):
+        with mock.patch.object(publisher.Throttle, 'pause') as pause, \
+                contextlib.redirect_stdout(io.StringIO()):
+            resp = self.client.get(f'{publisher.GRAPH_BASE}/sites/{SITE_ID}/pages')
+
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(pause.call_count, publisher.MAX_THROTTLE_RETRIES)
+        self.assertEqual(graph.stats()['total_calls'], publisher.MAX_THROTTLE_RETRIES + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
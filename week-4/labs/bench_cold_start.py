@@ -0,0 +1,118 @@
+"""
+Cold-start benchmark for soar_remediation.py
+============================================
+Measures what a new Lambda container pays before it can answer:
+
+  import        — importing soar_remediation (boto3, botocore, module setup)
+  no_findings   — first invocation with an event that has no findings
+  first_event   — first invocation with a real S3.2 event (creates the S3,
+                  Security Hub and SNS clients, remediates, updates, notifies)
+  warm_event    — an event of the same size for different buckets, in the
+                  same container (warm clients, nothing cached)
+  cached_event  — the first event again: every bucket was just verified, so
+                  this measures the verified-bucket cache path
+
+Each sample runs in a fresh Python process, so nothing is shared between
+samples, just as between Lambda containers. AWS is never contacted: the
+botocore 'before-send' hook in bench_stubs.py answers every request locally,
+so the numbers cover client construction, request signing and response
+parsing but not network time.
+
+Usage:
+    python bench_cold_start.py                 # 10 cold starts, 5 findings
+    python bench_cold_start.py --runs 20 --findings 50
+    python bench_cold_start.py --json cold_start.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+from bench_stubs import StubTransport, s3_event
+
+LAB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_event(findings, prefix='bench'):
+    return s3_event([f'{prefix}-bucket-{n}' for n in range(findings)], prefix)
+
+
+def child(findings):
+    """Run one cold start and print its timings as JSON."""
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+    os.environ.setdefault('SNS_TOPIC_ARN', 'arn:aws:sns:us-east-1:111122223333:bench')
+    sys.path.insert(0, LAB_DIR)
+
+    timings = {}
+    started = time.perf_counter()
+    import soar_remediation
+    timings['import'] = time.perf_counter() - started
+
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+    StubTransport().install()
+
+    event = make_event(findings)
+    phases = (
+        ('no_findings', {'detail': {}}),
+        ('first_event', event),
+        ('warm_event', make_event(findings, prefix='warm')),
+        ('cached_event', event),
+    )
+    for name, payload in phases:
+        started = time.perf_counter()
+        response = soar_remediation.lambda_handler(payload, None)
+        timings[name] = time.perf_counter() - started
+        if 'error' in response['body']:
+            sys.exit(f'{name} invocation failed: {response["body"]}')
+
+    print(json.dumps({name: seconds * 1000 for name, seconds in timings.items()}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure soar_remediation cold-start cost.')
+    parser.add_argument('--runs', type=int, default=10, help='fresh processes to sample (default 10)')
+    parser.add_argument('--findings', type=int, default=5, help='findings in the test event (default 5)')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.findings)
+        return
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, __file__, '--child', '--findings', str(args.findings)],
+            capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f'Cold start — {args.runs} fresh process(es), {args.findings} finding(s) per event\n')
+    print(f"  {'phase':<12}  {'median ms':>9}  {'min ms':>8}  {'max ms':>8}")
+    results = {}
+    for phase in ('import', 'no_findings', 'first_event', 'warm_event', 'cached_event'):
+        values = [sample[phase] for sample in samples]
+        results[phase] = {
+            'median_ms': round(statistics.median(values), 2),
+            'min_ms': round(min(values), 2),
+            'max_ms': round(max(values), 2),
+        }
+        print(f"  {phase:<12}  {results[phase]['median_ms']:>9.1f}  "
+              f"{results[phase]['min_ms']:>8.1f}  {results[phase]['max_ms']:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'runs': args.runs, 'findings': args.findings, 'phases': results}, f, indent=2)
+        print(f'\nResults written to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Load test for soar_remediation.py
+=================================
+Drives lambda_handler with synthetic Security Hub S3.2 events and reports,
+per event size:
+
+  findings/s       findings handled per second of handler time
+  p50 / p99 ms     per-finding remediation latency: from the start of the
+                   invocation until the finding's bucket finished
+                   remediating, over every finding of every invocation
+  inv p99 ms       invocation latency: until the handler returns, which is
+                   when Security Hub and SNS have been told about every
+                   finding (percentile over --invocations samples)
+  calls/finding    AWS requests per finding, retries included
+  peak KB          peak Python heap during one invocation (tracemalloc)
+
+AWS is never contacted. As in bench_cold_start.py, the botocore 'before-send'
+hook in bench_stubs.py answers every request in-process, so the real
+clients, retry mode and response parsing are exercised. The hook can add latency to every request
+and answer a fraction of them with the service's throttling error, which the
+clients' adaptive retries then back off from exactly as they would in AWS.
+
+Each event size runs in a fresh Python process after one warm-up invocation,
+so cold-start costs are excluded and memory numbers are not shared. Bucket
+names are unique per invocation, so the verified-bucket cache never hides
+the work; --duplicate-ratio controls how many findings in an event repeat a
+bucket already named in it.
+
+Usage:
+    python bench_load.py                                   # 1, 10, 100, 1000 findings
+    python bench_load.py --findings 500 --duplicate-ratio 0.5 --latency-ms 30
+    python bench_load.py --throttle-rate 0.05 --compliant-ratio 0.2 --json load.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import tracemalloc
+
+from bench_stubs import StubTransport, s3_event
+
+LAB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_event(findings, duplicate_ratio, compliant_ratio, invocation, rng):
+    """
+    An S3.2 event with `findings` findings over round(findings * (1 -
+    duplicate_ratio)) distinct buckets (at least one). Buckets whose name
+    ends in '-private' already have block public access fully on.
+    """
+    distinct = max(1, round(findings * (1 - duplicate_ratio)))
+    buckets = [
+        f'load-{invocation}-{n}' + ('-private' if rng.random() < compliant_ratio else '')
+        for n in range(distinct)
+    ]
+    # Every bucket appears once before any repeats
+    return s3_event([buckets[n % distinct] for n in range(findings)], prefix=f'load-{invocation}')
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def child(args):
+    """Run one event size and print its results as JSON."""
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'load')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'load')
+    os.environ.setdefault('SNS_TOPIC_ARN', 'arn:aws:sns:us-east-1:111122223333:load')
+    sys.path.insert(0, LAB_DIR)
+
+    import logging
+    import soar_remediation
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    transport = StubTransport(args.latency_ms / 1000, args.throttle_rate, args.seed)
+    transport.install()
+    rng = random.Random(args.seed)
+
+    # Note when each bucket finishes remediating; the remediation pool looks
+    # remediate_bucket up on the module, so wrapping it there is enough
+    finished = {}
+    remediate_bucket = soar_remediation.remediate_bucket
+
+    def timed_remediate_bucket(bucket_name):
+        outcome = remediate_bucket(bucket_name)
+        finished[bucket_name] = time.perf_counter()
+        return outcome
+
+    soar_remediation.remediate_bucket = timed_remediate_bucket
+
+    def invoke(invocation):
+        event = make_event(args.findings[0], args.duplicate_ratio, args.compliant_ratio, invocation, rng)
+        finished.clear()
+        started = time.perf_counter()
+        response = soar_remediation.lambda_handler(event, None)
+        ended = time.perf_counter()
+        results = json.loads(response['body'])
+        # A finding with no remediation of its own (e.g. skipped) is done when the handler returns
+        latencies = [(finished.get(result.get('bucket'), ended) - started) * 1000 for result in results]
+        return ended - started, latencies, results
+
+    invoke('warmup')
+    transport.calls.clear()
+
+    durations, latencies, statuses = [], [], {}
+    for invocation in range(args.invocations):
+        seconds, finding_latencies, results = invoke(invocation)
+        durations.append(seconds * 1000)
+        latencies.extend(finding_latencies)
+        for result in results:
+            statuses[result['status']] = statuses.get(result['status'], 0) + 1
+    calls = dict(transport.calls)
+
+    tracemalloc.start()
+    invoke('memory')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = args.findings[0] * args.invocations
+    print(json.dumps({
+        'findings': args.findings[0],
+        'invocations': args.invocations,
+        'findings_per_second': total / (sum(durations) / 1000),
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'invocation_p50_ms': percentile(durations, 50),
+        'invocation_p99_ms': percentile(durations, 99),
+        'calls_per_finding': sum(calls.values()) / total,
+        'calls': calls,
+        'statuses': statuses,
+        'peak_kb': peak / 1024,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure soar_remediation throughput against stubbed AWS.')
+    parser.add_argument('--findings', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='findings per event, one run per size (default 1 10 100 1000)')
+    parser.add_argument('--invocations', type=int, default=5, help='measured invocations per size (default 5)')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.0,
+                        help='fraction of findings that repeat a bucket already in the event (default 0)')
+    parser.add_argument('--compliant-ratio', type=float, default=0.0,
+                        help='fraction of buckets that are already private (default 0)')
+    parser.add_argument('--latency-ms', type=float, default=20, help='delay added to every AWS request (default 20)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='fraction of AWS requests answered with a throttling error (default 0)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for buckets and throttling (default 1)')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args)
+        return
+
+    print(f'Load test — {args.invocations} invocation(s) per size, {args.duplicate_ratio:.0%} duplicate buckets, '
+          f'{args.compliant_ratio:.0%} already private, {args.latency_ms:g} ms per request, '
+          f'{args.throttle_rate:.0%} throttled\n')
+    print(f"  {'findings':>8}  {'findings/s':>10}  {'p50 ms':>8}  {'p99 ms':>8}  {'inv p99 ms':>10}  "
+          f"{'calls/finding':>13}  {'peak KB':>8}  {'errors':>6}")
+    results = []
+    for size in args.findings:
+        command = [
+            sys.executable, __file__, '--child', '--findings', str(size),
+            '--invocations', str(args.invocations), '--duplicate-ratio', str(args.duplicate_ratio),
+            '--compliant-ratio', str(args.compliant_ratio), '--latency-ms', str(args.latency_ms),
+            '--throttle-rate', str(args.throttle_rate), '--seed', str(args.seed),
+        ]
+        out = subprocess.run(command, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"  {result['findings']:>8}  {result['findings_per_second']:>10.1f}  {result['p50_ms']:>8.1f}  "
+              f"{result['p99_ms']:>8.1f}  {result['invocation_p99_ms']:>10.1f}  {result['calls_per_finding']:>13.2f}  {result['peak_kb']:>8.0f}  "
+              f"{result['statuses'].get('error', 0):>6}")
+
+    if args.json:
+        settings = {name: value for name, value in vars(args).items() if name not in ('json', 'child', 'findings')}
+        with open(args.json, 'w') as f:
+            json.dump({'settings': settings, 'results': results}, f, indent=2)
+        print(f'\nResults written to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
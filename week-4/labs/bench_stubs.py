@@ -0,0 +1,114 @@
+"""
+Stubbed AWS for the soar_remediation benchmarks
+===============================================
+Shared by bench_cold_start.py and bench_load.py so both answer AWS the same
+way. StubTransport registers a botocore 'before-send' hook on the default
+boto3 session that answers every request in-process, so the real clients,
+request signing, retry mode and response parsing are exercised but AWS is
+never contacted. s3_event builds the Security Hub S3.2 events they send.
+
+boto3 is only imported once the transport is installed, so importing this
+module adds nothing to a measured cold start.
+"""
+
+import random
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+PRIVATE_CONFIG = (
+    b'<PublicAccessBlockConfiguration>'
+    b'<BlockPublicAcls>true</BlockPublicAcls><IgnorePublicAcls>true</IgnorePublicAcls>'
+    b'<BlockPublicPolicy>true</BlockPublicPolicy><RestrictPublicBuckets>true</RestrictPublicBuckets>'
+    b'</PublicAccessBlockConfiguration>'
+)
+
+RESPONSES = {
+    # operation: (status, headers, body)
+    'GetPublicAccessBlock': (404, {}, b'<Error><Code>NoSuchPublicAccessBlockConfiguration</Code>'
+                                      b'<Message>The public access block configuration was not found</Message></Error>'),
+    'PutPublicAccessBlock': (200, {}, b''),
+    'BatchUpdateFindings': (200, {}, b'{"ProcessedFindings": [], "UnprocessedFindings": []}'),
+    'Publish': (200, {}, b'<PublishResponse><PublishResult><MessageId>stub</MessageId>'
+                         b'</PublishResult></PublishResponse>'),
+    'PublishBatch': (200, {}, b'<PublishBatchResponse><PublishBatchResult><Successful/><Failed/>'
+                              b'</PublishBatchResult></PublishBatchResponse>'),
+}
+
+THROTTLED = {
+    's3': (503, {}, b'<Error><Code>SlowDown</Code><Message>Please reduce your request rate.</Message></Error>'),
+    'securityhub': (429, {'x-amzn-ErrorType': 'TooManyRequestsException'}, b'{"message": "Rate exceeded"}'),
+    'sns': (400, {}, b'<ErrorResponse><Error><Type>Sender</Type><Code>Throttling</Code>'
+                     b'<Message>Rate exceeded</Message></Error></ErrorResponse>'),
+}
+
+
+def s3_event(buckets, prefix='bench'):
+    """An S3.2 event with one finding per entry in `buckets` (names may repeat)."""
+    return {'detail': {'findings': [
+        {
+            'Id': f'arn:aws:securityhub:us-east-1:111122223333:finding/{prefix}-{n}',
+            'ProductArn': 'arn:aws:securityhub:us-east-1::product/aws/securityhub',
+            'GeneratorId': 'aws-foundational-security-best-practices/v/1.0.0/S3.2',
+            'Compliance': {'SecurityControlId': 'S3.2'},
+            'Resources': [{'Type': 'AwsS3Bucket', 'Id': f'arn:aws:s3:::{bucket}'}],
+        }
+        for n, bucket in enumerate(buckets)
+    ]}}
+
+
+class StubTransport:
+    """
+    Answers AWS requests in-process with an optional delay and throttling
+    rate, counting every request (retries included) by operation. Buckets
+    whose name ends in '-private' already have block public access fully on.
+    """
+
+    def __init__(self, latency=0.0, throttle_rate=0.0, seed=0):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.calls = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # Unlike time.sleep, unaffected if a caller patches the time module
+        self._delay = threading.Event()
+
+    def install(self):
+        import boto3
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register('before-send', self.respond)
+
+    def respond(self, request, **kwargs):
+        from botocore.awsrequest import AWSResponse
+
+        service, operation = self.operation(request)
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            throttled = self._rng.random() < self.throttle_rate
+        if self.latency:
+            self._delay.wait(self.latency)
+
+        if throttled:
+            status, headers, body = THROTTLED[service]
+        elif operation == 'GetPublicAccessBlock' and urlsplit(request.url).hostname.split('.')[0].endswith('-private'):
+            status, headers, body = 200, {}, PRIVATE_CONFIG
+        else:
+            status, headers, body = RESPONSES.get(operation, (200, {}, b''))
+        return AWSResponse(request.url, status, headers, Raw(body))
+
+    @staticmethod
+    def operation(request):
+        host = urlsplit(request.url).hostname
+        if 'securityhub' in host:
+            return 'securityhub', 'BatchUpdateFindings'
+        if 'sns' in host:
+            body = request.body.decode() if isinstance(request.body, bytes) else request.body or ''
+            return 'sns', parse_qs(body).get('Action', ['Publish'])[0]
+        return 's3', 'GetPublicAccessBlock' if request.method == 'GET' else 'PutPublicAccessBlock'
+
+
+class Raw:
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
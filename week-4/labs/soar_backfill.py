@@ -0,0 +1,257 @@
+"""
+SOAR Backfill: remediate existing Security Hub findings
+=======================================================
+The Lambda in soar_remediation.py only sees findings as EventBridge delivers
+them. When an account is onboarded with findings that already exist, this
+command sweeps them up with the same remediators:
+
+  1. Page through securityhub:GetFindings for ACTIVE findings in workflow
+     status NEW for the chosen controls (S3.2 by default)
+  2. Hand each page to a worker pool as soon as it arrives, paced by a
+     findings-per-second rate limit
+  3. Remediate, update Security Hub and notify exactly as the Lambda does
+     (process_findings → update_findings → notify_remediations)
+  4. Record every finding handled in a checkpoint file after each page
+
+Remediated findings leave the NEW workflow status, so a rerun no longer sees
+them. The checkpoint covers the rest: findings already attempted (errors and
+skipped findings stay NEW) are not retried on a rerun unless --retry-errors
+is given, and the totals carry on from the previous run.
+
+Clients come from soar_remediation.client(), so tests can inject botocore
+Stubber-wrapped clients (or moto-backed ones) with soar_remediation.set_clients.
+
+Usage:
+    python soar_backfill.py                               # S3.2, NEW + ACTIVE
+    python soar_backfill.py --controls S3.2 S3.8 --rate 20 --workers 8
+    python soar_backfill.py --checkpoint backfill.json --retry-errors
+
+IAM permissions: securityhub:GetFindings plus those of the Lambda role for
+the controls being remediated (see soar_remediation.py).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import soar_remediation
+
+logger = logging.getLogger(__name__)
+
+# GetFindings returns at most 100 findings per page
+PAGE_SIZE = 100
+CHECKPOINT_VERSION = 1
+
+
+def finding_filters(controls):
+    """GetFindings filters for ACTIVE, NEW findings of the given controls."""
+    return {
+        'ComplianceSecurityControlId': [{'Value': control, 'Comparison': 'EQUALS'} for control in controls],
+        'RecordState': [{'Value': 'ACTIVE', 'Comparison': 'EQUALS'}],
+        'WorkflowStatus': [{'Value': 'NEW', 'Comparison': 'EQUALS'}],
+    }
+
+
+def iter_finding_pages(filters, page_size=PAGE_SIZE):
+    """Yield GetFindings pages (lists of findings) as Security Hub returns them."""
+    paginator = soar_remediation.client('securityhub').get_paginator('get_findings')
+    for page in paginator.paginate(Filters=filters, PaginationConfig={'PageSize': page_size}):
+        yield page.get('Findings', [])
+
+
+class RateLimiter:
+    """
+    Paces work to `rate` findings per second across every worker. Each
+    acquire(n) reserves the next n/rate seconds and sleeps until its slot
+    starts; a rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + n / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+# ── Checkpoint ────────────────────────────────────────────────────────────────
+
+class Checkpoint:
+    """
+    {finding_id: status} for every finding handled so far, plus running
+    totals, saved as JSON after each page. A checkpoint written for other
+    controls is ignored rather than mixed in.
+    """
+
+    def __init__(self, path, controls):
+        self.path = path
+        self.controls = sorted(controls)
+        self.done = {}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get('version') == CHECKPOINT_VERSION and saved.get('controls') == self.controls:
+                self.done = saved.get('done', {})
+                self.elapsed = saved.get('elapsed', 0.0)
+            else:
+                logger.warning("Checkpoint %s was written for other controls — starting over", path)
+
+    def pending(self, findings, retry_errors=False):
+        """The findings not yet handled (or that failed, with retry_errors)."""
+        with self._lock:
+            return [
+                finding for finding in findings
+                if finding.get('Id') not in self.done
+                or (retry_errors and self.done[finding.get('Id')] == 'error')
+            ]
+
+    def record(self, results):
+        with self._lock:
+            self.done.update({result['finding_id']: result['status'] for result in results})
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for status in self.done.values():
+                counts[status] = counts.get(status, 0) + 1
+            return counts
+
+    def save(self, elapsed):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps({
+                'version': CHECKPOINT_VERSION,
+                'controls': self.controls,
+                'elapsed': self.elapsed + elapsed,
+                'done': self.done,
+            })
+            with open(f'{self.path}.tmp', 'w') as f:
+                f.write(data)
+            os.replace(f'{self.path}.tmp', self.path)
+
+
+# ── Backfill ──────────────────────────────────────────────────────────────────
+
+def backfill(controls=('S3.2',), workers=4, rate=0, checkpoint_path=None, retry_errors=False, notify=True):
+    """
+    Remediate every ACTIVE, NEW finding of `controls` and return a summary:
+    {'pages', 'seen', 'processed', 'counts', 'elapsed', 'findings_per_second'}.
+    'counts' (by status) includes findings handled by earlier runs that
+    shared the checkpoint; 'processed' and the throughput cover this run.
+
+    workers=0 processes each page inline as it is fetched and remediates
+    its resources one at a time, so every AWS call is made from the calling
+    thread in a fixed order (what botocore's Stubber expects).
+    """
+    unknown = [control for control in controls if control not in soar_remediation.REMEDIATORS]
+    if unknown:
+        raise ValueError(f"No remediator registered for control(s): {', '.join(unknown)}")
+
+    checkpoint = Checkpoint(checkpoint_path, controls)
+    limiter = RateLimiter(rate)
+    # Bounds the pages fetched but not yet processed, so a large backlog
+    # streams through instead of being read into memory up front
+    in_flight = threading.BoundedSemaphore(max(workers, 1) * 2)
+    started = time.perf_counter()
+    stats = {'pages': 0, 'seen': 0, 'processed': 0}
+    stats_lock = threading.Lock()
+
+    def run_page(number, findings):
+        try:
+            limiter.acquire(len(findings))
+            # Serial remediation too when running inline (workers=0)
+            results = soar_remediation.process_findings(findings, workers=None if workers > 0 else 1)
+            soar_remediation.update_findings(results)
+            if notify:
+                soar_remediation.notify_remediations(results)
+            checkpoint.record(results)
+            checkpoint.save(time.perf_counter() - started)
+            with stats_lock:
+                stats['processed'] += len(results)
+                processed = stats['processed']
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Page %d: %d finding(s) — %d this run, %.1f findings/s",
+                number, len(results), processed, processed / elapsed if elapsed else 0.0,
+            )
+        finally:
+            in_flight.release()
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for findings in iter_finding_pages(finding_filters(controls)):
+            stats['pages'] += 1
+            stats['seen'] += len(findings)
+            pending = checkpoint.pending(findings, retry_errors)
+            if not pending:
+                continue
+            in_flight.acquire()
+            if workers > 0:
+                futures.append(pool.submit(run_page, stats['pages'], pending))
+            else:
+                run_page(stats['pages'], pending)
+    for future in futures:
+        # Surface a worker's exception (e.g. expired credentials) to the caller
+        future.result()
+
+    elapsed = time.perf_counter() - started
+    checkpoint.save(elapsed)
+    return {
+        **stats,
+        'counts': checkpoint.counts(),
+        'elapsed': elapsed,
+        'findings_per_second': stats['processed'] / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Remediate existing Security Hub findings in bulk.')
+    parser.add_argument('--controls', nargs='+', default=['S3.2'], help='security control IDs to sweep (default S3.2)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='pages processed in parallel, 0 for inline and serial (default 4)')
+    parser.add_argument('--rate', type=float, default=10, help='max findings per second, 0 for no limit (default 10)')
+    parser.add_argument('--checkpoint', default='soar_backfill.checkpoint.json',
+                        help='progress file a rerun resumes from (default soar_backfill.checkpoint.json)')
+    parser.add_argument('--retry-errors', action='store_true', help='retry findings that failed in an earlier run')
+    parser.add_argument('--no-notify', action='store_true', help='skip the SNS notifications')
+    parser.add_argument('--region', help='AWS region (default: the configured one)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.region:
+        os.environ['AWS_DEFAULT_REGION'] = args.region
+
+    try:
+        summary = backfill(
+            args.controls, args.workers, args.rate, args.checkpoint, args.retry_errors, not args.no_notify,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+
+    print(f"\nBackfill of {', '.join(args.controls)}: {summary['seen']} finding(s) in {summary['pages']} page(s), "
+          f"{summary['processed']} processed in {summary['elapsed']:.1f} s "
+          f"({summary['findings_per_second']:.1f} findings/s)")
+    for status, count in sorted(summary['counts'].items()):
+        print(f'  {status:<18} {count:>6}')
+    if args.checkpoint:
+        print(f'\nProgress saved to {args.checkpoint}')
+
+
+if __name__ == '__main__':
+    main()
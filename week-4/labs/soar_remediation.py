@@ -1,22 +1,80 @@
 """
-SOAR Auto-Remediation: S3 Public Access
-========================================
-Triggered by:  EventBridge rule matching Security Hub S3.2 findings
-               (S3 buckets with public read or public ACL)
+SOAR Auto-Remediation
+=====================
+Triggered by:  EventBridge rule matching Security Hub findings for the
+               controls below, either directly or through an SQS queue the
+               rule targets
+
+Remediated controls:
+  S3.2 / S3.8  — S3 bucket allows public access: enable block public access
+  EC2.2        — default security group allows traffic: remove all its rules
+  IAM.3        — IAM user has access keys older than MAX_ACCESS_KEY_AGE_DAYS:
+                 deactivate them
 
 Actions:
-  1. Enable block public access on the affected S3 bucket (idempotent)
+  1. Remediate the affected resource (idempotent)
   2. Update the Security Hub finding workflow status to RESOLVED
-  3. Publish an SNS notification with remediation details
+  3. Publish an SNS notification with remediation details (one digest per
+     invocation by default)
+
+Each finding is dispatched on its control ID (Compliance.SecurityControlId,
+or the end of GeneratorId) to the remediator registered for it; findings for
+any other control are skipped. Each remediator receives all of its resources
+at once, so each distinct resource is checked once however many findings name
+it, and lookups are batched per service where the API allows (e.g. one
+DescribeSecurityGroups for every group, one ListAccessKeys per IAM user).
+Once every resource is done, the Security Hub updates are grouped by outcome
+and sent in BatchUpdateFindings calls of up to 100 findings each, retrying
+any the API reports back as unprocessed. Resources are assumed to be in the
+function's own account and region.
+
+Adding a control: subclass Remediator, implement resource_key, remediate_many
+and note, and register() an instance.
+
+SQS mode: when the function is fed from a queue, every message in the batch
+is one EventBridge event. All their findings are processed together, sharing
+the bucket dedupe and batched updates, and only messages with a finding that
+failed to remediate are returned in batchItemFailures for redelivery. The
+event source mapping needs FunctionResponseTypes=ReportBatchItemFailures.
 
 Environment variables required:
   SNS_TOPIC_ARN  — ARN of the SNS topic to notify (from Day 6 setup)
 
+Optional:
+  REMEDIATION_WORKERS     — resources remediated in parallel (default 16)
+  REMEDIATION_CACHE_TTL   — seconds a verified-private bucket is trusted (default 300)
+  REMEDIATION_CACHE_SIZE  — buckets remembered per container (default 10000)
+  REMEDIATION_CACHE_TABLE — DynamoDB table sharing that cache across containers
+                            (partition key 'bucket', TTL attribute 'expires_at');
+                            set AWS_ENDPOINT_URL_DYNAMODB to use DynamoDB Local
+  NOTIFICATION_MODE       — 'digest' (default): one SNS message per invocation
+                            listing every remediated resource; 'per-resource':
+                            one message per resource, sent ten at a time with
+                            PublishBatch ('per-bucket' is accepted as an alias)
+  MAX_ACCESS_KEY_AGE_DAYS — IAM.3 rotation limit in days (default 90)
+  EVENT_LOG_SAMPLE_RATE   — fraction of invocations that log the event itself
+                            (default 0.01; every invocation logs a summary line)
+  EVENT_LOG_MAX_BYTES     — sampled events are cut off at this size (default 4096)
+  METRICS_NAMESPACE       — CloudWatch namespace for the EMF metrics below
+                            (default SOARRemediation; empty disables them)
+
+Metrics (Embedded Metric Format, dimension FunctionName): each invocation
+writes one EMF log line, plus one more for every further 100 latency samples
+of a metric (EMF's limit per document). Counts: FindingsProcessed,
+Remediated, AlreadyCompliant, Errors, Skipped. Per-call latency in
+milliseconds: GetPublicAccessBlockLatency, PutPublicAccessBlockLatency,
+SecurityHubUpdateLatency, SNSPublishLatency.
+
 IAM permissions required (SOARRemediationRole):
   s3:GetBucketPublicAccessBlock
   s3:PutPublicAccessBlock
+  ec2:DescribeSecurityGroups
+  ec2:RevokeSecurityGroupIngress / ec2:RevokeSecurityGroupEgress
+  iam:ListAccessKeys / iam:UpdateAccessKey
   securityhub:BatchUpdateFindings
   sns:Publish
+  sqs:ReceiveMessage / sqs:DeleteMessage / sqs:GetQueueAttributes (SQS mode)
+  dynamodb:BatchGetItem / dynamodb:BatchWriteItem (only with REMEDIATION_CACHE_TABLE)
   logs:CreateLogGroup / logs:CreateLogStream / logs:PutLogEvents
 
 Design principles:
@@ -28,59 +86,789 @@ Design principles:
 import boto3
 import json
 import os
+import sys
+import time
+import random
 import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client('s3')
-securityhub = boto3.client('securityhub')
-sns = boto3.client('sns')
-
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN', '')
 
+# Distinct resources remediated concurrently within one invocation
+REMEDIATION_WORKERS = int(os.environ.get('REMEDIATION_WORKERS', '16'))
+
+# BatchUpdateFindings accepts at most 100 finding identifiers per call
+SECURITYHUB_BATCH_SIZE = 100
+# Attempts per chunk before unprocessed findings are given up on
+SECURITYHUB_MAX_ATTEMPTS = 3
+# Unprocessed-finding error codes worth retrying; anything else (e.g. a
+# finding that no longer exists) will fail the same way again
+SECURITYHUB_RETRYABLE_ERRORS = {'ThrottlingException', 'InternalException', 'TooManyRequestsException'}
+
+# How long a verified-private bucket is trusted, and how many are remembered
+CACHE_TTL_SECONDS = int(os.environ.get('REMEDIATION_CACHE_TTL', '300'))
+CACHE_MAX_ENTRIES = int(os.environ.get('REMEDIATION_CACHE_SIZE', '10000'))
+# Optional DynamoDB table (partition key 'bucket', TTL attribute 'expires_at')
+# sharing the cache between containers
+CACHE_TABLE = os.environ.get('REMEDIATION_CACHE_TABLE', '')
+DYNAMODB_GET_BATCH_SIZE = 100
+DYNAMODB_WRITE_BATCH_SIZE = 25
+# Attempts per batch while DynamoDB reports unprocessed keys or items
+DYNAMODB_MAX_ATTEMPTS = 4
+
+# 'digest' (one message per invocation) or 'per-resource' (one per resource)
+NOTIFICATION_MODE = os.environ.get('NOTIFICATION_MODE', 'digest')
+# PublishBatch takes at most 10 entries per call, and SNS caps a message (or
+# a whole PublishBatch request) at 262,144 bytes. Messages are packed to a
+# smaller budget, leaving headroom for the subject and request overhead.
+SNS_BATCH_SIZE = 10
+SNS_MAX_MESSAGE_BYTES = 262144
+SNS_MESSAGE_BUDGET = SNS_MAX_MESSAGE_BYTES - 16 * 1024
+
+# IAM.3: access keys older than this are deactivated
+MAX_ACCESS_KEY_AGE_DAYS = int(os.environ.get('MAX_ACCESS_KEY_AGE_DAYS', '90'))
+
+# Fraction of invocations that log the event itself, and how much of it
+EVENT_LOG_SAMPLE_RATE = float(os.environ.get('EVENT_LOG_SAMPLE_RATE', '0.01'))
+EVENT_LOG_MAX_BYTES = int(os.environ.get('EVENT_LOG_MAX_BYTES', '4096'))
+
+# CloudWatch namespace for the EMF metrics; empty turns them off
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'SOARRemediation')
+EMF_MAX_VALUES = 100
+METRIC_STATUS_NAMES = {
+    'remediated': 'Remediated',
+    'already_compliant': 'AlreadyCompliant',
+    'error': 'Errors',
+    'skipped': 'Skipped',
+}
+
+# Shared by every client. Adaptive retries back off client-side when AWS
+# throttles; tight timeouts fail a stuck call fast instead of burning the
+# Lambda's time budget; the pool is as large as the remediation thread pool,
+# which shares one S3 client.
+CLIENT_CONFIG = Config(
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    connect_timeout=2,
+    read_timeout=10,
+    max_pool_connections=REMEDIATION_WORKERS,
+)
+
+
+# ── AWS clients ───────────────────────────────────────────────────────────────
+#
+# Clients are created on first use rather than at import, so a cold start
+# only pays for the ones the invocation actually needs (an event with no
+# findings needs none), and are then reused for the life of the container.
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def client(service):
+    """Return this container's boto3 client for service, creating it on first use."""
+    existing = _clients.get(service)
+    if existing is not None:
+        return existing
+    # boto3's default session isn't safe to create clients from concurrently
+    with _clients_lock:
+        if service not in _clients:
+            _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+        return _clients[service]
+
+
+def set_clients(**clients):
+    """Install pre-built clients (stubs, other regions) by service name, e.g. s3=..."""
+    with _clients_lock:
+        _clients.update(clients)
+
+
+# ── Metrics and event logging ─────────────────────────────────────────────────
+#
+# Each invocation writes its metrics to stdout as CloudWatch Embedded Metric
+# Format, which CloudWatch Logs turns into metrics without a PutMetricData
+# call. Metrics are only recorded between metrics.start() and metrics.flush(),
+# i.e. inside lambda_handler; other callers (the backfill CLI) pay nothing.
+
+class Metrics:
+    """Per-invocation counters and latency samples, flushed as EMF."""
+
+    def __init__(self, namespace=METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._active = False
+        self._counts = {}
+        self._timings = {}
+
+    def start(self):
+        with self._lock:
+            self._counts, self._timings = {}, {}
+            self._active = bool(self.namespace)
+
+    def count(self, name, value=1):
+        if self._active:
+            with self._lock:
+                self._counts[name] = self._counts.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        """Record how long the block took, in milliseconds, under name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._active:
+                elapsed = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    self._timings.setdefault(name, []).append(round(elapsed, 3))
+
+    def record_results(self, results):
+        """Count findings processed and their outcomes."""
+        self.count('FindingsProcessed', len(results))
+        for status, name in METRIC_STATUS_NAMES.items():
+            self.count(name, sum(1 for result in results if result['status'] == status))
+
+    def flush(self):
+        """Write this invocation's metrics as EMF log lines and stop recording."""
+        with self._lock:
+            if not self._active:
+                return
+            self._active = False
+            counts, timings = self._counts, self._timings
+
+        function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+        # EMF allows at most 100 values per metric per document
+        documents = max([1] + [-(-len(values) // EMF_MAX_VALUES) for values in timings.values()])
+        for n in range(documents):
+            values = {
+                name: samples[n * EMF_MAX_VALUES:(n + 1) * EMF_MAX_VALUES]
+                for name, samples in timings.items()
+                if samples[n * EMF_MAX_VALUES:(n + 1) * EMF_MAX_VALUES]
+            }
+            units = {name: 'Milliseconds' for name in values}
+            if n == 0:
+                values.update(counts)
+                units.update({name: 'Count' for name in counts})
+            document = {
+                '_aws': {
+                    'Timestamp': int(time.time() * 1000),
+                    'CloudWatchMetrics': [{
+                        'Namespace': self.namespace,
+                        'Dimensions': [['FunctionName']],
+                        'Metrics': [{'Name': name, 'Unit': unit} for name, unit in units.items()],
+                    }],
+                },
+                'FunctionName': function_name,
+                **values,
+            }
+            sys.stdout.write(json.dumps(document) + '\n')
+        sys.stdout.flush()
+
+
+metrics = Metrics()
+
+
+def log_event(event):
+    """
+    Log a one-line summary of the event and, for a sample of invocations
+    (EVENT_LOG_SAMPLE_RATE, or always at DEBUG), the event itself cut off at
+    EVENT_LOG_MAX_BYTES. The event is serialised incrementally, so a large
+    event costs no more to log than its first EVENT_LOG_MAX_BYTES.
+    """
+    records = event.get('Records') or []
+    if records:
+        logger.info("Received event: %d SQS record(s)", len(records))
+    else:
+        logger.info("Received event: %d finding(s)", len(event.get('detail', {}).get('findings', [])))
+
+    if not (logger.isEnabledFor(logging.DEBUG) or random.random() < EVENT_LOG_SAMPLE_RATE):
+        return
+    chunks, size = [], 0
+    for chunk in json.JSONEncoder(default=str).iterencode(event):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > EVENT_LOG_MAX_BYTES:
+            logger.info("Event sample (truncated): %s…", ''.join(chunks)[:EVENT_LOG_MAX_BYTES])
+            return
+    logger.info("Event sample: %s", ''.join(chunks))
+
+
+# ── Verified-bucket cache ─────────────────────────────────────────────────────
+#
+# Security Hub keeps re-emitting a finding until Config re-evaluates the
+# bucket, so the same bucket arrives again and again shortly after it was
+# locked down. Buckets this function has verified or made private are
+# remembered, both in the warm container and optionally in a DynamoDB table
+# shared by every container, and a repeat finding is answered without any S3
+# call. The entry is only trusted for a finding observed *before* the bucket
+# was verified: a bucket made public again after that produces a newer
+# finding, which is checked as normal.
+
+class BucketCache:
+    """TTL-bounded, size-capped record of buckets known to block public access."""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, table=CACHE_TABLE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # bucket → verified_at (epoch seconds), oldest first
+        self._lock = threading.Lock()
+
+    def lookup(self, observed_at):
+        """
+        Given {bucket: when its newest finding was observed (epoch seconds, or
+        None)}, return the set of buckets verified since then and still fresh.
+        """
+        now = time.time()
+        verified = {}
+        with self._lock:
+            for bucket in observed_at:
+                verified_at = self._entries.get(bucket)
+                if verified_at is not None and now - verified_at < self.ttl:
+                    verified[bucket] = verified_at
+                    self._entries.move_to_end(bucket)
+
+        remote = [bucket for bucket in observed_at if bucket not in verified]
+        if self.table and remote:
+            for bucket, verified_at in self._fetch(remote).items():
+                if now - verified_at < self.ttl:
+                    verified[bucket] = verified_at
+                    self._remember(bucket, verified_at)
+
+        hits = {
+            bucket for bucket, verified_at in verified.items()
+            if observed_at[bucket] is None or observed_at[bucket] <= verified_at
+        }
+        with self._lock:
+            self.hits += len(hits)
+            self.misses += len(observed_at) - len(hits)
+        return hits
+
+    def add(self, buckets):
+        """Record buckets that were just verified or remediated."""
+        now = time.time()
+        for bucket in buckets:
+            self._remember(bucket, now)
+        if self.table and buckets:
+            self._store(buckets, now)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def _remember(self, bucket, verified_at):
+        with self._lock:
+            self._entries[bucket] = verified_at
+            self._entries.move_to_end(bucket)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fetch(self, buckets):
+        """
+        Read entries from the shared table, retrying keys DynamoDB leaves
+        unprocessed; any failure, or keys still unprocessed, just mean a miss.
+        """
+        found = {}
+        try:
+            for start in range(0, len(buckets), DYNAMODB_GET_BATCH_SIZE):
+                keys = [{'bucket': {'S': b}} for b in buckets[start:start + DYNAMODB_GET_BATCH_SIZE]]
+                request = {self.table: {
+                    'Keys': keys,
+                    # 'bucket' is a DynamoDB reserved word
+                    'ProjectionExpression': '#b, #v',
+                    'ExpressionAttributeNames': {'#b': 'bucket', '#v': 'verified_at'},
+                }}
+                for attempt in range(DYNAMODB_MAX_ATTEMPTS):
+                    if attempt:
+                        time.sleep(0.05 * 2 ** attempt)
+                    response = client('dynamodb').batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.table, []):
+                        found[item['bucket']['S']] = float(item['verified_at']['N'])
+                    request = response.get('UnprocessedKeys')
+                    if not request:
+                        break
+        except Exception as e:
+            logger.warning("Remediation cache read from %s failed: %s", self.table, str(e))
+        return found
+
+    def _store(self, buckets, verified_at):
+        # expires_at is the table's TTL attribute, so DynamoDB cleans up after us
+        expires_at = str(int(verified_at + self.ttl))
+        try:
+            for start in range(0, len(buckets), DYNAMODB_WRITE_BATCH_SIZE):
+                requests = [
+                    {'PutRequest': {'Item': {
+                        'bucket': {'S': bucket},
+                        'verified_at': {'N': repr(verified_at)},
+                        'expires_at': {'N': expires_at},
+                    }}}
+                    for bucket in buckets[start:start + DYNAMODB_WRITE_BATCH_SIZE]
+                ]
+                unprocessed = {self.table: requests}
+                for attempt in range(DYNAMODB_MAX_ATTEMPTS):
+                    if attempt:
+                        time.sleep(0.05 * 2 ** attempt)
+                    unprocessed = client('dynamodb').batch_write_item(RequestItems=unprocessed).get('UnprocessedItems')
+                    if not unprocessed:
+                        break
+                else:
+                    dropped = sum(len(items) for items in unprocessed.values())
+                    logger.warning("Remediation cache: %d write(s) to %s left unprocessed", dropped, self.table)
+        except Exception as e:
+            logger.warning("Remediation cache write to %s failed: %s", self.table, str(e))
+
+
+# Lives as long as the container, so warm invocations share it
+bucket_cache = BucketCache()
+
+
+def observed_epoch(finding):
+    """When the finding was last observed, as epoch seconds, or None if unknown."""
+    observed = finding.get('LastObservedAt') or finding.get('UpdatedAt')
+    if not observed:
+        return None
+    try:
+        return datetime.fromisoformat(observed.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def newer_observation(finding, other):
+    """True if finding was observed after other; an unknown time counts as oldest."""
+    observed, other_observed = observed_epoch(finding), observed_epoch(other)
+    return observed is not None and (other_observed is None or observed > other_observed)
+
 
 def lambda_handler(event, context):
-    logger.info("Received event: %s", json.dumps(event))
+    metrics.start()
+    try:
+        log_event(event)
+        return handle_event(event)
+    finally:
+        metrics.flush()
+
+
+def handle_event(event):
+    records = event.get('Records') or []
+    if records and records[0].get('eventSource') == 'aws:sqs':
+        return handle_sqs_batch(records)
 
     findings = event.get('detail', {}).get('findings', [])
     if not findings:
         logger.warning("No findings in event — nothing to process")
         return {'statusCode': 200, 'body': 'No findings'}
 
+    # Remediate everything first, then update Security Hub and notify in bulk
+    results = process_findings(findings)
+    metrics.record_results(results)
+    update_findings(results)
+    notify_remediations(results)
+
+    for result in results:
+        result.pop('product_arn', None)
+    return {'statusCode': 200, 'body': json.dumps(results)}
+
+
+def handle_sqs_batch(records):
+    """
+    Process a batch of SQS messages, each carrying one EventBridge event, and
+    report the messages that need redelivering.
+
+    A finding that appears in several messages (SQS delivers at least once)
+    is remediated and updated once; its outcome counts for every message.
+    Standard queues don't keep order, so the copy kept is the one observed
+    most recently: the verified-bucket cache must see the newest observation.
+    """
+    findings_by_key = {}
+    message_keys = []      # (messageId, [finding keys]) in batch order
+    failed = set()
+
+    for record in records:
+        message_id = record['messageId']
+        try:
+            findings = json.loads(record['body']).get('detail', {}).get('findings', [])
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error("Message %s is not an EventBridge event: %s", message_id, str(e))
+            failed.add(message_id)
+            continue
+        keys = []
+        for finding in findings:
+            key = (finding.get('Id'), finding.get('ProductArn'))
+            kept = findings_by_key.get(key)
+            if kept is None or newer_observation(finding, kept):
+                findings_by_key[key] = finding
+            keys.append(key)
+        message_keys.append((message_id, keys))
+
+    results = process_findings(list(findings_by_key.values()))
+    metrics.record_results(results)
+    update_findings(results)
+    notify_remediations(results)
+    result_for = dict(zip(findings_by_key, results))
+
+    for message_id, keys in message_keys:
+        if any(result_for[key]['status'] == 'error' for key in keys):
+            failed.add(message_id)
+
+    logger.info(
+        "SQS batch: %d message(s), %d unique finding(s), %d message(s) to retry",
+        len(records), len(findings_by_key), len(failed),
+    )
+    return {'batchItemFailures': [
+        {'itemIdentifier': record['messageId']} for record in records if record['messageId'] in failed
+    ]}
+
+
+def process_findings(findings, workers=None):
+    """
+    Remediate the resources behind a list of findings and return one result
+    per finding, in order.
+
+    Findings are grouped in one pass by the remediator registered for their
+    control, and by resource within each remediator, so every resource is
+    checked (and if needed fixed) once however many findings name it. Each
+    remediator then handles its whole group in one call. Findings for
+    controls with no remediator are skipped without further work.
+
+    workers bounds each remediator's thread pool (default
+    REMEDIATION_WORKERS); 1 makes every AWS call from the calling thread,
+    in order.
+    """
     results = []
+    groups = {}            # remediator → {resource: [(finding, result), ...]}
+    unknown = 0
+
     for finding in findings:
-        result = process_finding(finding)
+        finding_id = finding.get('Id', 'unknown')
+        control = control_id(finding)
+        remediator = REMEDIATORS.get(control)
+        if remediator is None:
+            unknown += 1
+            results.append({'finding_id': finding_id, 'status': 'skipped',
+                            'reason': f'no remediator for control {control}'})
+            continue
+        resource = remediator.resource_from_finding(finding)
+        if resource is None:
+            results.append({'finding_id': finding_id, 'control': control, 'status': 'skipped',
+                            'reason': f'no {remediator.resource_type} resource'})
+            continue
+        result = {
+            'finding_id': finding_id,
+            'product_arn': finding.get('ProductArn', ''),
+            'control': control,
+            remediator.resource_field: resource,
+        }
         results.append(result)
+        groups.setdefault(remediator, {}).setdefault(resource, []).append((finding, result))
 
-    return {'statusCode': 200, 'body': json.dumps(results)}
+    if unknown:
+        logger.warning("Skipped %d finding(s) with no registered remediator", unknown)
+
+    for remediator, by_resource in groups.items():
+        findings_by_resource = {r: [finding for finding, _ in pairs] for r, pairs in by_resource.items()}
+        try:
+            outcomes = remediator.remediate_many(findings_by_resource, workers)
+        except Exception as e:
+            # e.g. a connect timeout: fail this remediator's resources, not the invocation
+            logger.error("%s failed: %s", type(remediator).__name__, str(e))
+            outcomes = {resource: outcome('error', str(e)) for resource in by_resource}
+        # Fan each resource's outcome back out to every finding that named it
+        for resource, pairs in by_resource.items():
+            for _, result in pairs:
+                result.update(outcomes[resource])
+
+    return results
 
 
 def process_finding(finding):
-    finding_id = finding.get('Id', 'unknown')
-    product_arn = finding.get('ProductArn', '')
-    resources = finding.get('Resources', [])
-
-    logger.info("Processing finding: %s", finding_id)
-
-    # Extract S3 bucket name from the affected resource ARN
-    bucket_name = None
-    for resource in resources:
-        if resource.get('Type') == 'AwsS3Bucket':
-            arn = resource.get('Id', '')
-            bucket_name = arn.split(':::')[-1]
-            break
+    """
+    Remediate the resource behind a single finding; see process_findings.
+    Security Hub updates and notifications are left to the caller.
+    """
+    return process_findings([finding])[0]
 
-    if not bucket_name:
-        logger.warning("No S3 bucket found in finding resources")
-        return {'finding_id': finding_id, 'status': 'skipped', 'reason': 'no S3 resource'}
 
-    # ── Remediation (idempotent) ──────────────────────────────────────────────
-    remediated = False
+def control_id(finding):
+    """
+    The finding's security control, e.g. 'S3.2': Compliance.SecurityControlId
+    when present, otherwise the last segment of GeneratorId
+    ('aws-foundational-security-best-practices/v/1.0.0/S3.2').
+    """
+    control = finding.get('Compliance', {}).get('SecurityControlId')
+    if control:
+        return control
+    return finding.get('GeneratorId', '').rsplit('/', 1)[-1] or None
+
+
+def run_concurrently(fn, items, workers=None):
+    """
+    Return {item: fn(item)}, on a thread pool of up to `workers` (default
+    REMEDIATION_WORKERS) threads; in order on this thread when that's 1.
+    """
+    workers = min(workers or REMEDIATION_WORKERS, len(items))
+    if workers <= 1:
+        return {item: fn(item) for item in items}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(items, pool.map(fn, items)))
+
+
+# ── Remediators ───────────────────────────────────────────────────────────────
+#
+# One remediator per kind of fix, registered under every control it handles.
+# Dispatch is a dictionary lookup on the control ID, so adding controls adds
+# no per-finding cost.
+
+class Remediator(ABC):
+    """
+    Interface for a control's remediation.
+
+    resource_from_finding picks the resource key out of a finding (or None);
+    remediate_many receives {resource: [findings]} for one invocation and
+    returns {resource: outcome}, where an outcome is a dict merged into each
+    finding's result with at least 'status' ('remediated',
+    'already_compliant' or 'error'). Its workers argument goes to
+    run_concurrently.
+    """
+    control_ids = ()
+    resource_type = ''
+    resource_field = 'resource'
+    subject = 'SOAR Auto-Remediation'
+    action = ''
+    next_steps = ''
+
+    def resource_from_finding(self, finding):
+        for resource in finding.get('Resources', []):
+            if resource.get('Type') == self.resource_type:
+                return self.resource_key(resource)
+        return None
+
+    def resource_key(self, resource):
+        return resource.get('Id') or None
+
+    @abstractmethod
+    def remediate_many(self, findings_by_resource, workers=None):
+        """Remediate {resource: [findings]} and return {resource: outcome}."""
+
+    @abstractmethod
+    def note(self, remediated):
+        """Security Hub note text for a remediated / already compliant finding."""
+
+
+REMEDIATORS = {}
+
+
+def register(remediator):
+    for control in remediator.control_ids:
+        REMEDIATORS[control] = remediator
+    return remediator
+
+
+def outcome(status, error=None):
+    return {'status': status, 'error': error} if error else {'status': status}
+
+
+class S3PublicAccessRemediator(Remediator):
+    """S3.2 / S3.8: turn on every block public access setting on the bucket."""
+    control_ids = ('S3.2', 'S3.8')
+    resource_type = 'AwsS3Bucket'
+    resource_field = 'bucket'
+    subject = 'SOAR Auto-Remediation: S3 Bucket Made Private'
+    action = 'Block public access enabled automatically'
+    next_steps = (
+        'Review who made the bucket public and why. '
+        'Search CloudTrail for PutBucketPublicAccessBlock events on the affected bucket(s).'
+    )
+
+    def resource_key(self, resource):
+        # Resource ID format: arn:aws:s3:::bucket-name
+        return resource.get('Id', '').split(':::')[-1] or None
+
+    def remediate_many(self, findings_by_resource, workers=None):
+        # Newest observation per bucket decides whether a cached verification covers it
+        observed_at = {}
+        for bucket, findings in findings_by_resource.items():
+            times = [observed_epoch(finding) for finding in findings]
+            observed_at[bucket] = None if None in times else max(times)
+
+        cached = bucket_cache.lookup(observed_at)
+        buckets = [bucket for bucket in observed_at if bucket not in cached]
+        outcomes = remediate_buckets(buckets, workers)
+        bucket_cache.add([bucket for bucket, (status, _) in outcomes.items() if status != 'error'])
+        logger.info("Remediation cache: %d hit(s), %d miss(es)", len(cached), len(buckets))
+
+        results = {bucket: outcome(status, error) for bucket, (status, error) in outcomes.items()}
+        results.update({bucket: {'status': 'already_compliant', 'cached': True} for bucket in cached})
+        return results
+
+    def note(self, remediated):
+        return f'Block public access {"enabled on" if remediated else "already set on"} the affected bucket.'
+
+
+class DefaultSecurityGroupRemediator(Remediator):
+    """EC2.2: remove every inbound and outbound rule from a VPC's default security group."""
+    control_ids = ('EC2.2',)
+    resource_type = 'AwsEc2SecurityGroup'
+    resource_field = 'security_group'
+    subject = 'SOAR Auto-Remediation: Default Security Group Locked Down'
+    action = 'All inbound and outbound rules removed from the default security group'
+    next_steps = (
+        'Find what relied on the default security group and give it a dedicated one. '
+        'Search CloudTrail for AuthorizeSecurityGroupIngress events on the group.'
+    )
+    DESCRIBE_BATCH_SIZE = 200
+
+    def resource_key(self, resource):
+        # Resource ID format: arn:aws:ec2:region:account:security-group/sg-0123
+        return resource.get('Id', '').rsplit('/', 1)[-1] or None
+
+    def remediate_many(self, findings_by_resource, workers=None):
+        ec2 = client('ec2')
+        group_ids = list(findings_by_resource)
+        groups, results = {}, {}
+        for start in range(0, len(group_ids), self.DESCRIBE_BATCH_SIZE):
+            chunk = group_ids[start:start + self.DESCRIBE_BATCH_SIZE]
+            try:
+                groups.update({g['GroupId']: g for g in ec2.describe_security_groups(GroupIds=chunk)['SecurityGroups']})
+            except Exception:
+                # One deleted group fails the whole call; fall back to one at a time
+                for group_id in chunk:
+                    try:
+                        groups.update({g['GroupId']: g for g in ec2.describe_security_groups(GroupIds=[group_id])['SecurityGroups']})
+                    except Exception as e:
+                        results[group_id] = outcome('error', str(e))
+
+        pending = [group_id for group_id in group_ids if group_id not in results]
+        results.update(run_concurrently(
+            lambda group_id: self.lock_down(ec2, groups.get(group_id), group_id), pending, workers,
+        ))
+        return results
+
+    def lock_down(self, ec2, group, group_id):
+        if group is None:
+            return outcome('error', f'security group {group_id} not found')
+        try:
+            ingress, egress = group.get('IpPermissions', []), group.get('IpPermissionsEgress', [])
+            if not ingress and not egress:
+                return outcome('already_compliant')
+            if ingress:
+                ec2.revoke_security_group_ingress(GroupId=group_id, IpPermissions=ingress)
+            if egress:
+                ec2.revoke_security_group_egress(GroupId=group_id, IpPermissions=egress)
+            logger.info("✅ Remediated: %s — all default security group rules removed", group_id)
+            return outcome('remediated')
+        except Exception as e:
+            logger.error("Failed to remediate %s: %s", group_id, str(e))
+            return outcome('error', str(e))
+
+    def note(self, remediated):
+        return ('All rules removed from the default security group.' if remediated
+                else 'The default security group already has no rules.')
+
+
+class StaleAccessKeyRemediator(Remediator):
+    """
+    IAM.3: deactivate (not delete) every active access key of the user that
+    is older than the rotation limit. The control is evaluated per IAM user,
+    so findings name the user, not the key.
+    """
+    control_ids = ('IAM.3',)
+    resource_type = 'AwsIamUser'
+    resource_field = 'iam_user'
+    subject = 'SOAR Auto-Remediation: Stale IAM Access Keys Deactivated'
+    action = f'Access keys older than {MAX_ACCESS_KEY_AGE_DAYS} days deactivated'
+    next_steps = (
+        'Issue the user a new access key and update whatever used the old one, '
+        'then delete the deactivated keys.'
+    )
+
+    def resource_key(self, resource):
+        # Resource ID format: arn:aws:iam::account:user/optional/path/user-name
+        arn = resource.get('Id', '')
+        return arn.rsplit('/', 1)[-1] if ':user/' in arn else None
+
+    def remediate_many(self, findings_by_resource, workers=None):
+        iam = client('iam')
+        return run_concurrently(lambda user: self.deactivate_stale(iam, user), list(findings_by_resource), workers)
+
+    def deactivate_stale(self, iam, user):
+        """One ListAccessKeys for the user, then deactivate each stale, still-active key."""
+        try:
+            keys = iam.list_access_keys(UserName=user)['AccessKeyMetadata']
+        except Exception as e:
+            logger.error("Failed to list access keys of %s: %s", user, str(e))
+            return outcome('error', str(e))
+
+        now = datetime.now(timezone.utc)
+        stale = [
+            key['AccessKeyId'] for key in keys
+            if key['Status'] == 'Active' and (now - key['CreateDate']).days > MAX_ACCESS_KEY_AGE_DAYS
+        ]
+        if not stale:
+            return outcome('already_compliant')
+
+        deactivated, errors = [], []
+        for key_id in stale:
+            try:
+                iam.update_access_key(UserName=user, AccessKeyId=key_id, Status='Inactive')
+                logger.info("✅ Remediated: %s/%s — access key deactivated", user, key_id)
+                deactivated.append(key_id)
+            except Exception as e:
+                logger.error("Failed to deactivate %s/%s: %s", user, key_id, str(e))
+                errors.append(f'{key_id}: {e}')
+        if errors:
+            return {**outcome('error', '; '.join(errors)), 'deactivated_keys': deactivated}
+        return {**outcome('remediated'), 'deactivated_keys': deactivated}
+
+    def note(self, remediated):
+        return ('Stale access keys deactivated.' if remediated
+                else 'No active access keys older than the rotation limit.')
+
+
+register(S3PublicAccessRemediator())
+register(DefaultSecurityGroupRemediator())
+register(StaleAccessKeyRemediator())
+
+
+def remediator_for(result):
+    return REMEDIATORS[result['control']]
+
+
+def resource_of(result):
+    return result[remediator_for(result).resource_field]
+
+
+# ── S3 bucket remediation (idempotent) ────────────────────────────────────────
+
+def remediate_buckets(buckets, workers=None):
+    """
+    Remediate each bucket on a bounded thread pool sharing the one S3 client.
+    Returns {bucket: (status, error)}.
+    """
+    return run_concurrently(remediate_bucket, buckets, workers)
+
+
+def remediate_bucket(bucket_name):
+    """
+    Enable block public access on the bucket unless it is already fully on.
+    Returns ('remediated' | 'already_compliant' | 'error', error message or None).
+    """
+    s3 = client('s3')
     try:
         try:
-            current = s3.get_public_access_block(Bucket=bucket_name)
+            with metrics.timer('GetPublicAccessBlockLatency'):
+                current = s3.get_public_access_block(Bucket=bucket_name)
             cfg = current.get('PublicAccessBlockConfiguration', {})
             already_private = all([
                 cfg.get('BlockPublicAcls', False),
@@ -88,12 +876,17 @@ def process_finding(finding):
                 cfg.get('IgnorePublicAcls', False),
                 cfg.get('RestrictPublicBuckets', False),
             ])
-        except s3.exceptions.NoSuchPublicAccessBlockConfiguration:
+        except ClientError as e:
+            # Not a modelled exception on the S3 client, so match on the code
+            if e.response.get('Error', {}).get('Code') != 'NoSuchPublicAccessBlockConfiguration':
+                raise
             already_private = False
 
         if already_private:
             logger.info("Bucket %s is already private — idempotent exit", bucket_name)
-        else:
+            return 'already_compliant', None
+
+        with metrics.timer('PutPublicAccessBlockLatency'):
             s3.put_public_access_block(
                 Bucket=bucket_name,
                 PublicAccessBlockConfiguration={
@@ -103,58 +896,214 @@ def process_finding(finding):
                     'RestrictPublicBuckets': True,
                 }
             )
-            logger.info("✅ Remediated: %s — block public access enabled", bucket_name)
-            remediated = True
+        logger.info("✅ Remediated: %s — block public access enabled", bucket_name)
+        return 'remediated', None
 
     except Exception as e:
         logger.error("Failed to remediate %s: %s", bucket_name, str(e))
-        return {'finding_id': finding_id, 'bucket': bucket_name,
-                'status': 'error', 'error': str(e)}
+        return 'error', str(e)
+
+
+# ── SNS Notification ──────────────────────────────────────────────────────────
+#
+# Notifications go out once per invocation, after every resource is done.
+# NOTIFICATION_MODE=digest (the default) sends one message listing every
+# resource remediated in the invocation; NOTIFICATION_MODE=per-resource keeps
+# one message per resource but sends them with PublishBatch, ten per call.
+
+def notify_remediations(results):
+    """Tell the SNS topic about every resource remediated in this invocation."""
+    if not SNS_TOPIC_ARN:
+        return
+    remediated = {}
+    for result in results:
+        if result.get('status') == 'remediated':
+            key = (result['control'], resource_of(result))
+            remediated.setdefault(key, []).append(result['finding_id'])
+    if not remediated:
+        return
+
+    timestamp = datetime.now(timezone.utc).isoformat()
+    if NOTIFICATION_MODE in ('per-resource', 'per-bucket'):
+        messages = []
+        for (control, resource), finding_ids in remediated.items():
+            remediator = REMEDIATORS[control]
+            messages.append((remediator.subject, json.dumps({
+                'subject': remediator.subject,
+                'control': control,
+                remediator.resource_field: resource,
+                'finding_ids': finding_ids,
+                'action': remediator.action,
+                'timestamp': timestamp,
+                'next_steps': remediator.next_steps,
+            }, indent=2)))
+    else:
+        entries = [
+            {'control': control, 'resource': resource, 'action': REMEDIATORS[control].action,
+             'finding_ids': finding_ids}
+            for (control, resource), finding_ids in remediated.items()
+        ]
+        messages = [
+            (f'SOAR Auto-Remediation: {len(chunk)} resource(s) remediated', json.dumps(digest(chunk, timestamp)))
+            for chunk in digest_chunks(entries, timestamp)
+        ]
+    publish_messages(messages)
+
+
+def digest(entries, timestamp):
+    return {
+        'subject': 'SOAR Auto-Remediation: Resources Remediated',
+        'remediations': entries,
+        'timestamp': timestamp,
+        'next_steps': {control: REMEDIATORS[control].next_steps
+                       for control in dict.fromkeys(entry['control'] for entry in entries)},
+    }
+
+
+def digest_chunks(entries, timestamp):
+    """
+    Split digest entries so each message, compactly encoded, stays within
+    SNS_MESSAGE_BUDGET. The fixed part is sized with the next steps of every
+    control present, so it never underestimates a chunk.
+    """
+    overhead = encoded_size(json.dumps(digest(entries, timestamp) | {'remediations': []}))
+    # ', ' between entries
+    sizes = [encoded_size(json.dumps(entry)) + 2 for entry in entries]
+    return pack(entries, sizes, SNS_MESSAGE_BUDGET - overhead)
+
+
+def pack(items, sizes, budget, max_items=None):
+    """
+    Group items, in order, so each group's sizes sum to at most `budget`
+    (and it holds at most max_items). An item larger than the budget on its
+    own goes out alone rather than being dropped.
+    """
+    chunks, chunk, used = [], [], 0
+    for item, size in zip(items, sizes):
+        if chunk and (used + size > budget or len(chunk) == max_items):
+            chunks.append(chunk)
+            chunk, used = [], 0
+        chunk.append(item)
+        used += size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def encoded_size(text):
+    return len(text.encode('utf-8'))
 
-    # ── Update Security Hub finding ───────────────────────────────────────────
+
+def publish_messages(messages):
+    """
+    Publish (subject, message) pairs with PublishBatch, up to ten per call
+    and within SNS_MESSAGE_BUDGET in total; a single message goes out with a
+    plain Publish. Entries the batch reports as failed are retried one at a
+    time.
+    """
+    sns = client('sns')
+    if len(messages) == 1:
+        subject, message = messages[0]
+        publish_one(sns, subject, message)
+        return
+
+    sizes = [encoded_size(subject) + encoded_size(message) for subject, message in messages]
+    for chunk in pack(messages, sizes, SNS_MESSAGE_BUDGET, SNS_BATCH_SIZE):
+        entries = [
+            {'Id': f'm{n}', 'Subject': subject, 'Message': message}
+            for n, (subject, message) in enumerate(chunk)
+        ]
+        try:
+            with metrics.timer('SNSPublishLatency'):
+                response = sns.publish_batch(TopicArn=SNS_TOPIC_ARN, PublishBatchRequestEntries=entries)
+            failed = [int(entry['Id'][1:]) for entry in response.get('Failed', [])]
+        except Exception as e:
+            logger.warning("SNS PublishBatch failed: %s", str(e))
+            failed = list(range(len(chunk)))
+        for n in failed:
+            publish_one(sns, *chunk[n])
+        logger.info("SNS: %d notification(s) sent to %s", len(chunk), SNS_TOPIC_ARN)
+
+
+def publish_one(sns, subject, message):
     try:
-        securityhub.batch_update_findings(
-            FindingIdentifiers=[{'Id': finding_id, 'ProductArn': product_arn}],
-            Workflow={'Status': 'RESOLVED' if remediated else 'NOTIFIED'},
-            Note={
-                'Text': (
-                    f'Auto-remediated by SOAR Lambda at '
-                    f'{datetime.now(timezone.utc).isoformat()}. '
-                    f'Block public access {"enabled on" if remediated else "already set on"} '
-                    f'{bucket_name}.'
-                ),
-                'UpdatedBy': 'SOARRemediationLambda'
-            }
-        )
-        logger.info("Security Hub finding updated")
+        with metrics.timer('SNSPublishLatency'):
+            sns.publish(TopicArn=SNS_TOPIC_ARN, Subject=subject, Message=message)
+        logger.info("SNS notification sent to %s", SNS_TOPIC_ARN)
     except Exception as e:
-        logger.warning("Could not update Security Hub finding: %s", str(e))
+        logger.warning("Could not send SNS notification: %s", str(e))
 
-    # ── SNS Notification ──────────────────────────────────────────────────────
-    if SNS_TOPIC_ARN and remediated:
-        message = {
-            'subject': 'SOAR Auto-Remediation: S3 Bucket Made Private',
-            'bucket': bucket_name,
-            'finding_id': finding_id,
-            'action': 'Block public access enabled automatically',
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'next_steps': (
-                'Review who made the bucket public and why. '
-                'Search CloudTrail for PutBucketPublicAccessBlock events on this bucket.'
-            )
+
+# ── Security Hub updates ──────────────────────────────────────────────────────
+
+def update_findings(results):
+    """
+    Update the workflow status and note of every remediated or already
+    compliant finding, as few BatchUpdateFindings calls as possible.
+
+    The note deliberately doesn't name the resource, so every finding with
+    the same remediator and outcome shares one update; the resource is already
+    on the finding. Sets 'securityhub_updated' on each result that was sent.
+    """
+    timestamp = datetime.now(timezone.utc).isoformat()
+    groups = {}
+    for result in results:
+        if result['status'] not in ('remediated', 'already_compliant'):
+            continue
+        groups.setdefault((result['status'], remediator_for(result)), []).append(result)
+
+    for (status, remediator), group in groups.items():
+        remediated = status == 'remediated'
+        workflow = {'Status': 'RESOLVED' if remediated else 'NOTIFIED'}
+        note = {
+            'Text': f'Auto-remediated by SOAR Lambda at {timestamp}. {remediator.note(remediated)}',
+            'UpdatedBy': 'SOARRemediationLambda'
         }
+        by_id = {result['finding_id']: result for result in group}
+        identifiers = [{'Id': r['finding_id'], 'ProductArn': r['product_arn']} for r in group]
+
+        for start in range(0, len(identifiers), SECURITYHUB_BATCH_SIZE):
+            chunk = identifiers[start:start + SECURITYHUB_BATCH_SIZE]
+            failed = batch_update_with_retry(chunk, workflow, note)
+            for identifier in chunk:
+                by_id[identifier['Id']]['securityhub_updated'] = identifier['Id'] not in failed
+
+        logger.info("Security Hub: %d finding(s) set to %s", len(group), workflow['Status'])
+
+
+def batch_update_with_retry(identifiers, workflow, note):
+    """
+    Send one BatchUpdateFindings call, retrying findings Security Hub reports
+    as unprocessed with a transient error. Returns {finding_id: error} for
+    the findings that could not be updated.
+    """
+    pending = identifiers
+    failed = {}
+    for attempt in range(SECURITYHUB_MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(0.2 * 2 ** attempt)
+        for identifier in pending:
+            failed.pop(identifier['Id'], None)
         try:
-            sns.publish(
-                TopicArn=SNS_TOPIC_ARN,
-                Subject='SOAR Auto-Remediation: S3 bucket made private',
-                Message=json.dumps(message, indent=2)
-            )
-            logger.info("SNS notification sent to %s", SNS_TOPIC_ARN)
+            with metrics.timer('SecurityHubUpdateLatency'):
+                response = client('securityhub').batch_update_findings(
+                    FindingIdentifiers=pending, Workflow=workflow, Note=note,
+                )
         except Exception as e:
-            logger.warning("Could not send SNS notification: %s", str(e))
+            logger.warning("BatchUpdateFindings failed (attempt %d): %s", attempt + 1, str(e))
+            failed.update({identifier['Id']: str(e) for identifier in pending})
+            continue
 
-    return {
-        'finding_id': finding_id,
-        'bucket': bucket_name,
-        'status': 'remediated' if remediated else 'already_compliant'
-    }
+        retry = []
+        for item in response.get('UnprocessedFindings', []):
+            identifier = item['FindingIdentifier']
+            failed[identifier['Id']] = f"{item.get('ErrorCode')}: {item.get('ErrorMessage')}"
+            if item.get('ErrorCode') in SECURITYHUB_RETRYABLE_ERRORS:
+                retry.append(identifier)
+        if not retry:
+            break
+        pending = retry
+
+    for finding_id, error in failed.items():
+        logger.warning("Could not update Security Hub finding %s: %s", finding_id, error)
+    return failed
@@ -0,0 +1,115 @@
+"""
+Offline tests for soar_backfill.py. Real boto3 clients are wrapped in
+botocore's Stubber and injected through soar_remediation.set_clients;
+workers=0 keeps every call on this thread, in the order the stubs expect.
+
+    python -m unittest discover -s week-4/labs
+"""
+
+import os
+import json
+import logging
+import tempfile
+import unittest
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ['SNS_TOPIC_ARN'] = ''
+os.environ['METRICS_NAMESPACE'] = ''
+
+import boto3
+from botocore.stub import Stubber, ANY
+
+import soar_backfill
+import soar_remediation
+
+logging.getLogger().setLevel(logging.CRITICAL)
+
+
+def s3_finding(bucket):
+    return {
+        'SchemaVersion': '2018-10-08',
+        'Id': f'finding-{bucket}',
+        'ProductArn': 'arn:aws:securityhub:us-east-1::product/aws/securityhub',
+        'GeneratorId': 'aws-foundational-security-best-practices/v/1.0.0/S3.2',
+        'AwsAccountId': '123456789012',
+        'CreatedAt': '2026-01-01T00:00:00Z',
+        'UpdatedAt': '2026-01-01T00:00:00Z',
+        'Title': 'S3 buckets should prohibit public read access',
+        'Description': 'S3.2',
+        'Resources': [{'Type': 'AwsS3Bucket', 'Id': f'arn:aws:s3:::{bucket}'}],
+    }
+
+
+class BackfillCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.securityhub = Stubber(boto3.client('securityhub'))
+        self.s3 = Stubber(boto3.client('s3'))
+        self.securityhub.activate()
+        self.s3.activate()
+        soar_remediation.set_clients(securityhub=self.securityhub.client, s3=self.s3.client)
+        soar_remediation.bucket_cache = soar_remediation.BucketCache(table='')
+        self.filters = soar_backfill.finding_filters(['S3.2'])
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def tearDown(self):
+        self.securityhub.deactivate()
+        self.s3.deactivate()
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        os.rmdir(os.path.dirname(self.checkpoint))
+
+    def expect_page(self, findings):
+        self.securityhub.add_response(
+            'get_findings', {'Findings': findings},
+            {'Filters': self.filters, 'MaxResults': soar_backfill.PAGE_SIZE},
+        )
+
+    def expect_remediation(self, buckets):
+        for bucket in buckets:
+            self.s3.add_client_error(
+                'get_public_access_block', 'NoSuchPublicAccessBlockConfiguration', expected_params={'Bucket': bucket},
+            )
+            self.s3.add_response(
+                'put_public_access_block', {}, {'Bucket': bucket, 'PublicAccessBlockConfiguration': ANY},
+            )
+        self.securityhub.add_response(
+            'batch_update_findings', {'ProcessedFindings': [], 'UnprocessedFindings': []},
+            {'FindingIdentifiers': ANY, 'Workflow': {'Status': 'RESOLVED'}, 'Note': ANY},
+        )
+
+    def backfill(self):
+        summary = soar_backfill.backfill(workers=0, checkpoint_path=self.checkpoint)
+        self.securityhub.assert_no_pending_responses()
+        self.s3.assert_no_pending_responses()
+        return summary
+
+    def test_rerun_skips_findings_in_the_checkpoint(self):
+        self.expect_page([s3_finding('a'), s3_finding('b')])
+        self.expect_remediation(['a', 'b'])
+        summary = self.backfill()
+
+        self.assertEqual((summary['pages'], summary['seen'], summary['processed']), (1, 2, 2))
+        with open(self.checkpoint) as f:
+            saved = json.load(f)
+        self.assertEqual(saved['controls'], ['S3.2'])
+        self.assertEqual(sorted(saved['done']), ['finding-a', 'finding-b'])
+
+        # Security Hub still lists both (say the workflow update lagged) plus
+        # a new one: only the new finding is remediated
+        self.expect_page([s3_finding('a'), s3_finding('b'), s3_finding('c')])
+        self.expect_remediation(['c'])
+        summary = self.backfill()
+
+        self.assertEqual((summary['seen'], summary['processed']), (3, 1))
+        self.assertEqual(sum(summary['counts'].values()), 3)
+
+        # Nothing left to do: the page is fetched and nothing else is called
+        self.expect_page([s3_finding('a'), s3_finding('b'), s3_finding('c')])
+        self.assertEqual(self.backfill()['processed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Offline tests for soar_remediation.py. AWS clients are replaced with small
+fakes through soar_remediation.set_clients, so nothing leaves the machine.
+
+    python -m unittest discover -s week-4/labs
+"""
+
+import os
+import json
+import time
+import logging
+import unittest
+from datetime import datetime, timezone
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['SNS_TOPIC_ARN'] = ''
+os.environ['METRICS_NAMESPACE'] = ''
+
+import soar_remediation
+from botocore.exceptions import ClientError
+
+logging.getLogger().setLevel(logging.CRITICAL)
+
+
+class FakeS3:
+    """Every bucket starts with no public access block configuration."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_public_access_block(self, Bucket):
+        self.calls.append(('get', Bucket))
+        raise ClientError({'Error': {'Code': 'NoSuchPublicAccessBlockConfiguration'}}, 'GetPublicAccessBlock')
+
+    def put_public_access_block(self, Bucket, PublicAccessBlockConfiguration):
+        self.calls.append(('put', Bucket))
+
+
+class FakeSecurityHub:
+    def batch_update_findings(self, **kwargs):
+        return {'ProcessedFindings': kwargs['FindingIdentifiers'], 'UnprocessedFindings': []}
+
+
+def iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def s3_finding(bucket, observed_at):
+    return {
+        'Id': f'finding-{bucket}',
+        'ProductArn': 'arn:aws:securityhub:us-east-1::product/aws/securityhub',
+        'GeneratorId': 'aws-foundational-security-best-practices/v/1.0.0/S3.2',
+        'LastObservedAt': iso(observed_at),
+        'Resources': [{'Type': 'AwsS3Bucket', 'Id': f'arn:aws:s3:::{bucket}'}],
+    }
+
+
+def sqs_record(message_id, findings):
+    return {
+        'eventSource': 'aws:sqs',
+        'messageId': message_id,
+        'body': json.dumps({'detail': {'findings': findings}}),
+    }
+
+
+class FakeSNS:
+    def __init__(self):
+        self.requests = []
+
+    def publish(self, **kwargs):
+        self.requests.append([kwargs])
+
+    def publish_batch(self, PublishBatchRequestEntries, **kwargs):
+        self.requests.append(PublishBatchRequestEntries)
+        return {'Successful': [], 'Failed': []}
+
+
+class SqsDuplicateFindingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = FakeS3()
+        soar_remediation.set_clients(s3=self.s3, securityhub=FakeSecurityHub())
+        soar_remediation.bucket_cache = soar_remediation.BucketCache(table='')
+
+    def test_newest_copy_of_a_duplicate_finding_is_checked_against_the_cache(self):
+        now = time.time()
+        # Verified private 10 s ago; one copy predates that, the other doesn't
+        soar_remediation.bucket_cache._remember('reexposed', now - 10)
+        stale, fresh = s3_finding('reexposed', now - 60), s3_finding('reexposed', now - 1)
+
+        for order in ([stale, fresh], [fresh, stale]):
+            with self.subTest(first=order[0]['LastObservedAt']):
+                self.s3.calls.clear()
+                response = soar_remediation.lambda_handler(
+                    {'Records': [sqs_record('m1', [order[0]]), sqs_record('m2', [order[1]])]}, None,
+                )
+                self.assertEqual(response, {'batchItemFailures': []})
+                self.assertEqual(self.s3.calls, [('get', 'reexposed'), ('put', 'reexposed')])
+                soar_remediation.bucket_cache._remember('reexposed', now - 10)
+
+    def test_older_observation_than_the_cache_is_a_hit(self):
+        now = time.time()
+        soar_remediation.bucket_cache._remember('private', now - 10)
+        records = [sqs_record('m1', [s3_finding('private', now - 60)]),
+                   sqs_record('m2', [s3_finding('private', now - 30)])]
+
+        self.assertEqual(soar_remediation.lambda_handler({'Records': records}, None), {'batchItemFailures': []})
+        self.assertEqual(self.s3.calls, [])
+
+
+class DigestSizeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sns = FakeSNS()
+        soar_remediation.set_clients(sns=self.sns)
+        self.topic, soar_remediation.SNS_TOPIC_ARN = soar_remediation.SNS_TOPIC_ARN, 'arn:aws:sns:us-east-1:123456789012:soar'
+
+    def tearDown(self):
+        soar_remediation.SNS_TOPIC_ARN = self.topic
+
+    def test_digests_stay_under_the_sns_size_limit(self):
+        # Long bucket names and several findings per bucket: ~4,000 resources
+        # make well over 256 KB of digest
+        results = [
+            {'finding_id': f'arn:aws:securityhub:us-east-1:123456789012:finding/{n:08d}-{i}', 'control': 'S3.2',
+             'bucket': f'{n:08d}-' + 'b' * 54, 'status': 'remediated'}
+            for n in range(4000) for i in range(3)
+        ]
+        soar_remediation.notify_remediations(results)
+
+        remediated = []
+        self.assertGreater(sum(len(request) for request in self.sns.requests), 1)
+        for request in self.sns.requests:
+            self.assertLessEqual(len(request), soar_remediation.SNS_BATCH_SIZE)
+            self.assertLessEqual(
+                sum(len(entry['Subject'].encode()) + len(entry['Message'].encode()) for entry in request),
+                soar_remediation.SNS_MAX_MESSAGE_BYTES,
+            )
+            for entry in request:
+                remediated += [item['resource'] for item in json.loads(entry['Message'])['remediations']]
+        self.assertEqual(remediated, [f'{n:08d}-' + 'b' * 54 for n in range(4000)])
+
+
+if __name__ == '__main__':
+    unittest.main()